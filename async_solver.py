@@ -0,0 +1,75 @@
+"""
+	asyncio interface of the solver: the solve runs on a reusable thread pool, so the event loop stays responsive,
+	cancelling the awaiting task stops the solver and progress events arrive as an async iterator.
+"""
+
+__all__ = ["get_executor", "solve_async", "solve_events"]
+
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+#                                                        IMPORTS                                                       #
+# -------------------------------------------------------------------------------------------------------------------- #
+
+import asyncio, threading, functools
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Union, Callable
+from collections.abc import AsyncIterator
+
+from nonogram_solver import NonogramSolver
+
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+#                                                       EXECUTOR                                                       #
+# -------------------------------------------------------------------------------------------------------------------- #
+
+_executor: Union[ThreadPoolExecutor, None] = None
+_executor_lock = threading.Lock()
+
+def get_executor() -> ThreadPoolExecutor:
+	"""Returns the thread pool shared by every async solve, it is created on first use.\n
+	Threads are needed because the solver is stopped through a threading.Event, a process pool can't see it."""
+	global _executor
+	with _executor_lock:
+		if _executor is None:
+			_executor = ThreadPoolExecutor(thread_name_prefix = "nonogram_solver")
+		return _executor
+
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+#                                                      ASYNC SOLVE                                                     #
+# -------------------------------------------------------------------------------------------------------------------- #
+
+async def solve_async(solver: NonogramSolver, depth: int = 1, executor: Union[Executor, None] = None, progress: Union[Callable[[dict], None], None] = None, **solve_options) -> bool:
+	"""Awaitable version of NonogramSolver.solve, the remaining keyword arguments are passed on (e.g. jobs, engine or time_limit).
+	progress is called in the event loop, not in the solver thread.\n
+	Cancelling the awaiting task stops the solver at its next line solve (with either board engine) or, with the SAT engine, at its next callback,
+	and leaves the cells it decided on the board (stopped_by == "cancelled")."""
+	loop = asyncio.get_running_loop()
+	cancel = threading.Event()
+	report = (lambda event: loop.call_soon_threadsafe(progress, event)) if progress is not None else None
+	future = loop.run_in_executor(executor or get_executor(), functools.partial(solver.solve, False, depth, progress = report, cancel = cancel, **solve_options))
+	try:
+		return await future
+	finally:
+		#also reached on cancellation, the thread keeps running until the solver sees the event
+		cancel.set()
+
+async def solve_events(solver: NonogramSolver, depth: int = 1, executor: Union[Executor, None] = None, **solve_options) -> AsyncIterator[dict]:
+	"""Solves like solve_async and yields the progress events of NonogramSolver.solve, the last one is the "done" event.
+	Leaving the loop early or cancelling the task that iterates stops the solver."""
+	loop = asyncio.get_running_loop()
+	queue: asyncio.Queue = asyncio.Queue()
+	cancel = threading.Event()
+	report = lambda event: loop.call_soon_threadsafe(queue.put_nowait, event)
+	future = loop.run_in_executor(executor or get_executor(), functools.partial(solver.solve, False, depth, progress = report, cancel = cancel, **solve_options))
+	#the events of the thread are queued before the future finishes, None marks the end
+	future.add_done_callback(lambda _: queue.put_nowait(None))
+	try:
+		while (event := await queue.get()) is not None:
+			yield event
+		await future #raises the exception of the solver, if there is one
+	finally:
+		cancel.set()
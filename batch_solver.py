@@ -0,0 +1,163 @@
+"""
+	Solves many nonogram puzzles in a pool of worker processes and streams one JSON line per puzzle as soon as it is finished.
+"""
+
+__all__ = ["find_puzzles", "load_puzzle", "solve_nonogram", "solve_puzzle", "solve_batch"]
+
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+#                                                        IMPORTS                                                       #
+# -------------------------------------------------------------------------------------------------------------------- #
+
+import os, io, sys, glob, json, time, argparse, contextlib
+from multiprocessing import Pool
+from typing import Union
+from collections.abc import Iterator
+
+from nonogram import Nonogram
+from nonogram_solver import NonogramSolver, LineCache
+from puzzle_pack import PuzzlePack
+from result_store import ResultStore
+
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+#                                                   BATCH FUNCTIONS                                                    #
+# -------------------------------------------------------------------------------------------------------------------- #
+
+def find_puzzles(paths: list[str]) -> list[str]:
+	"""Expands directories (every CSV file inside) and glob patterns into a sorted list of puzzle files without duplicates.
+	Puzzle packs are expanded into one 'pack#index' entry per puzzle."""
+	result = []
+	for path in paths:
+		if path.endswith(".pack") and os.path.isfile(path):
+			with PuzzlePack(path) as pack:
+				result.extend(f"{path}#{index}" for index in range(len(pack)))
+		elif os.path.isdir(path):
+			result.extend(sorted(glob.glob(os.path.join(path, "*.csv"))))
+		elif glob.has_magic(path):
+			result.extend(sorted(glob.glob(path, recursive = True)))
+		else:
+			result.append(path)
+	return list(dict.fromkeys(result))
+
+_open_packs: dict[str, PuzzlePack] = {} #packs stay mapped for the lifetime of a worker process
+_open_stores: dict[tuple[str, int], ResultStore] = {} #result stores stay open for the lifetime of a worker process
+
+def load_puzzle(file: str) -> Nonogram:
+	"""Loads a CSV file or a single puzzle of a pack ('pack#index')."""
+	pack_file, separator, index = file.rpartition("#")
+	if separator and pack_file.endswith(".pack"):
+		if pack_file not in _open_packs:
+			_open_packs[pack_file] = PuzzlePack(pack_file)
+		return _open_packs[pack_file][int(index)]
+	return Nonogram(file)
+
+def solve_nonogram(nonogram: Nonogram, depth: int = 1, timeout: float = 0, options: Union[dict, None] = None, line_cache: Union[LineCache, None] = None,
+                   store: Union[ResultStore, None] = None) -> dict:
+	"""Solves a puzzle with increasing assumption depths until it is solved or depth is reached.
+	Returns a JSON-serializable result, depth is the lowest assumption depth that solved the puzzle.
+	solved is only true if the board agrees with every number, a puzzle without solution gets an error.\n
+	A timeout (in seconds) is shared by all depths and passed to the solver as its time limit.
+	A given line cache replaces the cache of the solver, so it can stay warm over many puzzles.
+	With a store a known solution is returned right away (with "stored": true), new solutions are added to it."""
+	result = {"solved": False, "time": 0.0, "depth": None}
+	start_time = time.perf_counter()
+	solver = NonogramSolver(nonogram, **(options or {}))
+	if line_cache is not None:
+		solver.line_cache = line_cache
+	entry = store.get(nonogram) if store is not None else None
+	if entry is not None:
+		nonogram.board[...] = entry["board"]
+		result.update({"solved": True, "depth": entry["depth"], "stored": True, "time": round(time.perf_counter() - start_time, 6), "board": nonogram.to_text()})
+		return result
+	try:
+		for current_depth in range(depth + 1):
+			remaining = timeout - (time.perf_counter() - start_time) if timeout > 0 else 0
+			if timeout > 0 and remaining <= 0:
+				result["timeout"] = True
+				break
+			if solver.solve(False, current_depth, time_limit = remaining):
+				result["solved"] = True
+				result["depth"] = current_depth
+				break
+			if solver.stopped_by == "time":
+				result["timeout"] = True
+				break
+			#deeper assumptions can't help if a line already breaks its numbers
+			if solver.unsolvable:
+				result["error"] = "The puzzle has no solution, its numbers contradict each other."
+				break
+	except RecursionError:
+		result["error"] = "Maximum recursion depth reached."
+	result["time"] = round(time.perf_counter() - start_time, 6)
+	result["board"] = solver.nonogram.to_text()
+	if result["solved"] and store is not None:
+		store.put(nonogram, solver.nonogram.board, result["depth"], {"line_solves": solver.line_solves, "probes": solver.probes, "time": result["time"]})
+	return result
+
+def solve_puzzle(file: str, depth: int = 1, timeout: float = 0, options: Union[dict, None] = None, store_file: Union[str, None] = None, store_size: int = ResultStore.DEFAULT_SIZE) -> dict:
+	"""Loads a puzzle file (or 'pack#index') and solves it with solve_nonogram, the time includes loading.
+	With store_file the ResultStore in that file is used."""
+	result = {"file": file, "solved": False, "time": 0.0, "depth": None}
+	start_time = time.perf_counter()
+	#the Nonogram class prints its errors, they must not end up in the JSON stream
+	messages = io.StringIO()
+	try:
+		with contextlib.redirect_stdout(messages):
+			nonogram = load_puzzle(file)
+	except (OSError, ValueError, IndexError) as error:
+		result["error"] = str(error)
+		return result
+	if not hasattr(nonogram, "board"):
+		result["error"] = messages.getvalue().strip()
+		return result
+	store = None
+	if store_file is not None:
+		if (store_file, store_size) not in _open_stores:
+			_open_stores[store_file, store_size] = ResultStore(store_file, store_size)
+		store = _open_stores[store_file, store_size]
+	result.update(solve_nonogram(nonogram, depth, timeout, options, store = store))
+	result["time"] = round(time.perf_counter() - start_time, 6)
+	return result
+
+def _solve_puzzle_task(task: tuple) -> dict:
+	return solve_puzzle(*task)
+
+def solve_batch(files: list[str], depth: int = 1, timeout: float = 0, jobs: int = 0, options: Union[dict, None] = None, store_file: Union[str, None] = None, store_size: int = ResultStore.DEFAULT_SIZE) -> Iterator[dict]:
+	"""Solves every file in a pool of jobs worker processes (0 == one per CPU) and yields the results in the order they finish.
+	With store_file every worker looks the puzzles up in that ResultStore and adds new solutions to it."""
+	tasks = [(file, depth, timeout, options, store_file, store_size) for file in files]
+	with Pool(jobs or os.cpu_count()) as pool:
+		yield from pool.imap_unordered(_solve_puzzle_task, tasks)
+
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+#                                                         MAIN                                                         #
+# -------------------------------------------------------------------------------------------------------------------- #
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description = "Solves many nonogram puzzles and prints one JSON line per puzzle.")
+	parser.add_argument("paths", nargs = "+", help = "CSV files, puzzle packs, directories or glob patterns")
+	parser.add_argument("-d", "--depth", dest = "depth", type = int, choices = range(NonogramSolver.MAX_DEPTH + 1), default = 1, help = "maximum assumption depth")
+	parser.add_argument("-j", "--jobs", dest = "jobs", type = int, default = 0, help = "amount of worker processes (default: one per CPU)")
+	parser.add_argument("--timeout", dest = "timeout", type = float, default = 0, metavar = "SECONDS", help = "time limit per puzzle, 0 means no limit")
+	parser.add_argument("-l", "--line-solver", dest = "line_solver", choices = NonogramSolver.LINE_SOLVERS, default = "settle", help = "line solving method")
+	parser.add_argument("-b", "--board", dest = "board_engine", choices = NonogramSolver.BOARD_ENGINES, default = "array", help = "board representation used for propagation")
+	parser.add_argument("-c", "--cache", dest = "cache_size", type = int, default = LineCache.DEFAULT_SIZE, metavar = "SIZE", help = "amount of solved lines to remember, 0 turns the cache off")
+	parser.add_argument("--store", dest = "store", metavar = "FILE", help = "SQLite result store that answers known puzzles and keeps new solutions")
+	parser.add_argument("--store-size", dest = "store_size", type = int, default = ResultStore.DEFAULT_SIZE, metavar = "N", help = "amount of solutions the result store keeps, the least recently used ones are evicted")
+	args = parser.parse_args()
+
+	files = find_puzzles(args.paths)
+	if not files:
+		print("No puzzles found.", file = sys.stderr)
+		exit(1)
+	options = {"line_solver": args.line_solver, "board_engine": args.board_engine, "cache_size": args.cache_size}
+	try:
+		for result in solve_batch(files, args.depth, args.timeout, args.jobs, options, args.store, args.store_size):
+			print(json.dumps(result, ensure_ascii = False), flush = True)
+	except KeyboardInterrupt:
+		exit(130)
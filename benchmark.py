@@ -0,0 +1,177 @@
+"""
+	Benchmark and regression suite: solves the example puzzles and generated bigger ones with every solver mode and depth,
+	stores wall time, line solves, probes and peak memory in a JSON baseline and compares later runs against it.
+"""
+
+__all__ = ["MODES", "benchmark_puzzles", "run_benchmark", "compare"]
+
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+#                                                        IMPORTS                                                       #
+# -------------------------------------------------------------------------------------------------------------------- #
+
+import os, sys, glob, json, time, argparse, platform, tracemalloc
+import numpy as np
+
+from nonogram import Nonogram, EMPTY
+from nonogram_solver import NonogramSolver
+from generator import random_nonogram
+
+EXAMPLE_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "example_files")
+
+#solver options of every mode, the first one is the default configuration, SOLVE_OPTIONS go to NonogramSolver.solve instead of the constructor
+SOLVE_OPTIONS = ("engine", "jobs")
+MODES = {
+	"default":     {},
+	"permutation": {"line_solver": "permutation"},
+	"bitset":      {"board_engine": "bitset"},
+	"alternating": {"schedule": "alternating"},
+	"copy":        {"search": "copy"},
+	"no-cache":    {"cache_size": 0},
+	"heuristic":   {"probe_order": "heuristic"},
+	"random":      {"probe_order": "random"},
+	"sat":         {"engine": "sat"},
+	"parallel":    {"jobs": 2},
+}
+
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+#                                                        PUZZLES                                                       #
+# -------------------------------------------------------------------------------------------------------------------- #
+
+def benchmark_puzzles(sizes: list[int], seed: int = 0) -> dict[str, Nonogram]:
+	"""Returns every example puzzle and one generated puzzle per size, keyed by name."""
+	puzzles = {}
+	for file in sorted(glob.glob(os.path.join(EXAMPLE_DIRECTORY, "*.csv"))):
+		puzzles[os.path.splitext(os.path.basename(file))[0]] = Nonogram(file)
+	for size in sizes:
+		puzzles[f"random{size}x{size}"] = random_nonogram(size, size, seed = seed + size)
+	return puzzles
+
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+#                                                      MEASUREMENT                                                     #
+# -------------------------------------------------------------------------------------------------------------------- #
+
+def _solve_once(nonogram: Nonogram, options: dict, depth: int, timeout: float) -> tuple[NonogramSolver, bool, bool, float]:
+	solver = NonogramSolver(nonogram.copy(), **{key: value for key, value in options.items() if key not in SOLVE_OPTIONS})
+	start_time = time.perf_counter()
+	solved = solver.solve(False, depth, time_limit = timeout, **{key: value for key, value in options.items() if key in SOLVE_OPTIONS})
+	return solver, solved, solver.stopped_by == "time", time.perf_counter() - start_time
+
+def measure(nonogram: Nonogram, options: dict, depth: int, repeat: int = 3, timeout: float = 0) -> dict:
+	"""Solves a puzzle repeat times and once more under tracemalloc. Wall time is the fastest run, memory is the peak of the traced run
+	(only of this process, the worker processes of the parallel mode aren't traced)."""
+	times = []
+	for _ in range(max(repeat, 1)):
+		solver, solved, timed_out, elapsed = _solve_once(nonogram, options, depth, timeout)
+		times.append(elapsed)
+		if timed_out:
+			return {"timeout": True, "time": elapsed}
+	tracemalloc.start()
+	try:
+		_solve_once(nonogram, options, depth, timeout)
+		peak_memory = tracemalloc.get_traced_memory()[1]
+	finally:
+		tracemalloc.stop()
+	return {
+		"time": round(min(times), 6),
+		"line_solves": solver.line_solves,
+		"probes": solver.probes,
+		"peak_memory": peak_memory,
+		"solved": solved,
+		"decided": round(float(np.mean(solver.nonogram.board != EMPTY)), 4),
+	}
+
+def run_benchmark(puzzles: dict[str, Nonogram], modes: list[str], depths: list[int], repeat: int = 3, timeout: float = 0, progress = None) -> dict:
+	"""Measures every combination of puzzle, mode and depth. The keys of the results are 'puzzle|mode|depth'."""
+	results = {}
+	for name, nonogram in puzzles.items():
+		for mode in modes:
+			for depth in depths:
+				key = f"{name}|{mode}|{depth}"
+				results[key] = measure(nonogram, MODES[mode], depth, repeat, timeout)
+				if progress is not None:
+					progress(key, results[key])
+	return {
+		"python": platform.python_version(),
+		"numpy": np.__version__,
+		"created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+		"results": results,
+	}
+
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+#                                                      COMPARISON                                                      #
+# -------------------------------------------------------------------------------------------------------------------- #
+
+def compare(baseline: dict, current: dict, threshold: float = 0.25, minimum_time: float = 0.005) -> list[str]:
+	"""Returns a message for every result that got slower (relative threshold, ignoring runs below minimum_time seconds),
+	needs more line solves, probes or memory, stopped being solved or started to time out."""
+	regressions = []
+	for key, new in current["results"].items():
+		old = baseline["results"].get(key)
+		if old is None:
+			continue
+		if new.get("timeout") and not old.get("timeout"):
+			regressions.append(f"{key}: timed out (was {old['time']:.6f}s)")
+			continue
+		if new.get("timeout") or old.get("timeout"):
+			continue
+		if max(old["time"], new["time"]) >= minimum_time and new["time"] > old["time"] * (1 + threshold):
+			regressions.append(f"{key}: time {old['time']:.6f}s -> {new['time']:.6f}s (+{new['time'] / old['time'] - 1:.0%})")
+		if new["line_solves"] > old["line_solves"]:
+			regressions.append(f"{key}: line solves {old['line_solves']} -> {new['line_solves']}")
+		#older baselines don't have probes
+		if new["probes"] > old.get("probes", new["probes"]):
+			regressions.append(f"{key}: probes {old['probes']} -> {new['probes']}")
+		if new["peak_memory"] > old["peak_memory"] * (1 + threshold):
+			regressions.append(f"{key}: peak memory {old['peak_memory']} -> {new['peak_memory']} bytes")
+		if old["solved"] and not new["solved"]:
+			regressions.append(f"{key}: not solved anymore")
+	return regressions
+
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+#                                                         MAIN                                                         #
+# -------------------------------------------------------------------------------------------------------------------- #
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description = "Benchmarks the nonogram solver and detects performance regressions.")
+	parser.add_argument("-o", "--output", dest = "output", help = "writes the results as JSON baseline to this file")
+	parser.add_argument("--compare", dest = "compare", metavar = "BASELINE", help = "compares the results with a baseline file and exits with 1 on regressions")
+	parser.add_argument("-m", "--modes", dest = "modes", nargs = "+", choices = MODES, default = list(MODES), help = "solver modes to measure")
+	parser.add_argument("-d", "--depths", dest = "depths", nargs = "+", type = int, default = [0, 1], help = "assumption depths to measure")
+	parser.add_argument("--sizes", dest = "sizes", nargs = "*", type = int, default = [20, 30, 40], help = "sizes of the generated square puzzles")
+	parser.add_argument("--seed", dest = "seed", type = int, default = 0, help = "seed of the generated puzzles")
+	parser.add_argument("-r", "--repeat", dest = "repeat", type = int, default = 3, help = "runs per measurement, the fastest one counts")
+	parser.add_argument("--timeout", dest = "timeout", type = float, default = 30, metavar = "SECONDS", help = "time limit per run, 0 means no limit")
+	parser.add_argument("--threshold", dest = "threshold", type = float, default = 0.25, help = "relative slowdown that counts as regression")
+	args = parser.parse_args()
+
+	def print_result(key: str, result: dict):
+		if result.get("timeout"):
+			print(f"{key:<40} timeout", flush = True)
+		else:
+			print(f"{key:<40} {result['time']:10.6f}s {result['line_solves']:8d} solves {result['probes']:6d} probes {result['peak_memory'] / 1024:10.1f} KiB  {'solved' if result['solved'] else ''}", flush = True)
+
+	current = run_benchmark(benchmark_puzzles(args.sizes, args.seed), args.modes, args.depths, args.repeat, args.timeout, print_result)
+	if args.output:
+		with open(args.output, "w") as f:
+			json.dump(current, f, indent = "\t")
+	if args.compare:
+		with open(args.compare, "r") as f:
+			baseline = json.load(f)
+		regressions = compare(baseline, current, args.threshold)
+		print()
+		if regressions:
+			print(f"{len(regressions)} regression(s) compared to {args.compare}:")
+			for message in regressions:
+				print("  " + message)
+			sys.exit(1)
+		print(f"No regressions compared to {args.compare}.")
@@ -0,0 +1,289 @@
+"""
+	Compact board engine: every row and every column is stored as a pair of integer bitmasks (known boxes, known crosses).
+	Bit i of a row belongs to column i, bit i of a column belongs to row i.
+"""
+
+__all__ = ["BitNonogram", "array_to_mask", "box_runs", "line_fits", "leftmost_placement", "settle_line"]
+
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+#                                                        IMPORTS                                                       #
+# -------------------------------------------------------------------------------------------------------------------- #
+
+from typing import Union, Callable
+
+import numpy as np
+
+from nonogram import Nonogram, EMPTY, CROSS, BOX
+
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+#                                                    LINE FUNCTIONS                                                    #
+# -------------------------------------------------------------------------------------------------------------------- #
+
+def reverse_bits(mask: int, length: int) -> int:
+	"""Mirrors the lowest length bits of mask."""
+	return int(format(mask, f"0{length}b")[::-1], 2) if length else 0
+
+def array_to_mask(array: np.ndarray) -> int:
+	"""Converts a boolean array of any size into a mask, index i becomes bit i."""
+	return int.from_bytes(np.packbits(array, bitorder = "little").tobytes(), "little")
+
+def box_runs(boxes: int) -> list[int]:
+	"""Returns the lengths of all groups of set bits, starting at the lowest bit.\n
+	Examples:
+	- 0b0110111 -> [3, 2]"""
+	result = []
+	while boxes:
+		boxes >>= (boxes & -boxes).bit_length() - 1 #strip trailing zeros
+		length = (~boxes & (boxes + 1)).bit_length() - 1 #count trailing ones
+		result.append(length)
+		boxes >>= length
+	return result
+
+def _windows(free: int, number: int) -> int:
+	"""Sets bit s if the bits s to s + number - 1 are all set in free."""
+	result, width = free, 1
+	#doubling: result holds windows of size width
+	while width * 2 <= number:
+		result &= result >> width
+		width *= 2
+	if width < number:
+		result &= result >> (number - width)
+	return result
+
+def _smear(starts: int, number: int) -> int:
+	"""Sets the bits s to s + number - 1 for every bit s set in starts."""
+	result, width = starts, 1
+	while width * 2 <= number:
+		result |= result << width
+		width *= 2
+	if width < number:
+		result |= result << (number - width)
+	return result
+
+def _fill(seeds: int, passable: int) -> int:
+	"""Extends every seed upwards as long as it stands on a passable bit.\n
+	Adding a seed to its run of passable bits carries through the run, the xor recovers the carried bits."""
+	return seeds | ((passable + (seeds & passable)) ^ passable)
+
+def _forward(numbers: list[int], boxes: int, crosses: int, length: int) -> list[int]:
+	"""Bit i of the j-th result tells if the first j numbers fit into the first i cells."""
+	full = (1 << length) - 1
+	free = full & ~crosses
+	not_box = full & ~boxes
+	result = [_fill(1, not_box)]
+	for number in numbers:
+		previous = result[-1]
+		starts = (((previous & not_box) << 1) | (previous & 1)) & _windows(free, number)
+		result.append(_fill(starts << number, not_box))
+	return result
+
+def line_fits(numbers: list[int], boxes: int, crosses: int, length: int) -> bool:
+	"""Checks if the numbers can still be placed into a line with the given known boxes and crosses."""
+	return bool(_forward(numbers, boxes, crosses, length)[-1] >> length & 1)
+
+def leftmost_placement(numbers: list[int], boxes: int, crosses: int, length: int) -> Union[int, None]:
+	"""Returns the boxes of the leftmost placement of the numbers that agrees with the known boxes and crosses or None if there is none.\n
+	Every number takes its first start from which the following numbers still fit, no known box may be skipped on the way."""
+	k = len(numbers)
+	reversed_forward = _forward(numbers[::-1], reverse_bits(boxes, length), reverse_bits(crosses, length), length)
+	if not reversed_forward[-1] >> length & 1:
+		return None
+	full = (1 << length) - 1
+	free = full & ~crosses
+	not_box = full & ~boxes
+	result = position = 0
+	for j, number in enumerate(numbers):
+		#bit i tells if the numbers after this one fit into the cells from i on
+		after = reverse_bits(reversed_forward[k - j - 1], length + 1)
+		ends = ((after >> 1) & not_box) | (after & (1 << length))
+		skipped = boxes >> position
+		last_start = position + (((skipped & -skipped).bit_length() - 1) if skipped else length)
+		starts = _windows(free, number) & (ends >> number) & ~((1 << position) - 1) & ((1 << (last_start + 1)) - 1)
+		start = (starts & -starts).bit_length() - 1
+		result |= ((1 << number) - 1) << start
+		position = start + number + 1
+	return result
+
+def settle_line(numbers: list[int], boxes: int, crosses: int, length: int) -> Union[tuple[int, int], None]:
+	"""Calculates every box and cross that is forced by the numbers, using only bit arithmetic.
+	Returns the new (boxes, crosses) masks of the line or None if the numbers can't be placed.\n
+	Same algorithm as NonogramSolver.__solve_line_settle, the inner loop over cells is replaced by bit-parallel operations."""
+	k = len(numbers)
+	forward = _forward(numbers, boxes, crosses, length)
+	if not forward[-1] >> length & 1:
+		return None
+	reversed_forward = _forward(numbers[::-1], reverse_bits(boxes, length), reverse_bits(crosses, length), length)
+	#bit i of backward[j] tells if the numbers from j on fit into the cells from i on
+	backward = [reverse_bits(reversed_forward[k - j], length + 1) for j in range(k + 1)]
+
+	full = (1 << length) - 1
+	free = full & ~crosses
+	not_box = full & ~boxes
+	can_cross = 0
+	for before, after in zip(forward, backward):
+		can_cross |= before & (after >> 1)
+	can_cross &= not_box
+	can_box = 0
+	for j, number in enumerate(numbers):
+		before, after = forward[j], backward[j + 1]
+		ends = ((after >> 1) & not_box) | (after & (1 << length))
+		starts = (((before & not_box) << 1) | (before & 1)) & _windows(free, number) & (ends >> number)
+		can_box |= _smear(starts, number)
+	can_box &= full
+	return boxes | (full & ~can_cross), crosses | (full & ~can_box)
+
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+#                                                   BITNONOGRAM CLASS                                                  #
+# -------------------------------------------------------------------------------------------------------------------- #
+
+class BitNonogram:
+	"""Nonogram puzzle which stores its board as bitmasks, the row and column masks are always kept in sync.
+
+	Attributes:
+		row_numbers
+		column_numbers
+		row_boxes (list[int]): Known boxes of every row.
+		row_crosses (list[int]): Known crosses of every row.
+		column_boxes (list[int]): Known boxes of every column.
+		column_crosses (list[int]): Known crosses of every column.
+	"""
+	def __init__(self, row_numbers: list[list[int]], column_numbers: list[list[int]]):
+		self.row_numbers = row_numbers
+		self.column_numbers = column_numbers
+		self.height, self.width = len(row_numbers), len(column_numbers)
+		self.row_boxes      = [0] * self.height
+		self.row_crosses    = [0] * self.height
+		self.column_boxes   = [0] * self.width
+		self.column_crosses = [0] * self.width
+		self.row_solves = self.column_solves = 0
+
+	@property
+	def line_solves(self) -> int:
+		return self.row_solves + self.column_solves
+
+	@classmethod
+	def from_nonogram(cls, nonogram: Nonogram):
+		result = cls(nonogram.row_numbers, nonogram.column_numbers)
+		for i, j in zip(*(nonogram.board == BOX).nonzero()):
+			result.set_cell(int(i), int(j), BOX)
+		for i, j in zip(*(nonogram.board == CROSS).nonzero()):
+			result.set_cell(int(i), int(j), CROSS)
+		return result
+
+	def to_nonogram(self) -> Nonogram:
+		result = Nonogram(None, (self.height, self.width))
+		result.row_numbers = self.row_numbers
+		result.column_numbers = self.column_numbers
+		self.write_to(result)
+		return result
+
+	def write_to(self, nonogram: Nonogram):
+		"""Writes the known cells into the board of an existing nonogram."""
+		for i, (boxes, crosses) in enumerate(zip(self.row_boxes, self.row_crosses)):
+			row = nonogram.board[i]
+			row[self.__mask_to_array(boxes, self.width)] = BOX
+			row[self.__mask_to_array(crosses, self.width)] = CROSS
+
+	@staticmethod
+	def __mask_to_array(mask: int, length: int) -> np.ndarray:
+		"""Converts a mask of any size into a boolean array, bit i becomes index i."""
+		return np.frombuffer(format(mask, f"0{length}b")[::-1].encode(), np.ubyte) == ord("1")
+
+	def __repr__(self) -> str:
+		return "BitNonogram Puzzle ({}x{})".format(self.height, self.width)
+
+	def __str__(self) -> str:
+		return str(self.to_nonogram())
+
+	def copy(self):
+		temp = BitNonogram(self.row_numbers, self.column_numbers)
+		temp.row_boxes      = self.row_boxes.copy()
+		temp.row_crosses    = self.row_crosses.copy()
+		temp.column_boxes   = self.column_boxes.copy()
+		temp.column_crosses = self.column_crosses.copy()
+		return temp
+
+	def get_cell(self, i: int, j: int) -> int:
+		if self.row_boxes[i] >> j & 1:
+			return BOX
+		if self.row_crosses[i] >> j & 1:
+			return CROSS
+		return EMPTY
+
+	def set_cell(self, i: int, j: int, value: int):
+		"""Sets a single cell in the row and the column mask."""
+		if value == BOX:
+			self.row_boxes[i] |= 1 << j
+			self.column_boxes[j] |= 1 << i
+		elif value == CROSS:
+			self.row_crosses[i] |= 1 << j
+			self.column_crosses[j] |= 1 << i
+
+	def is_solved(self) -> bool:
+		full = (1 << self.width) - 1
+		return all(boxes | crosses == full for boxes, crosses in zip(self.row_boxes, self.row_crosses))
+
+	def is_line_complete(self, index: int, column: bool = False) -> bool:
+		"""Checks if the boxes of a line already match its numbers."""
+		if column:
+			return box_runs(self.column_boxes[index]) == self.column_numbers[index]
+		return box_runs(self.row_boxes[index]) == self.row_numbers[index]
+
+	def solve_line(self, index: int, column: bool = False) -> Union[set[int], None]:
+		"""Solves a single row or column and updates the crossing lines. Returns the changed positions or None on a contradiction."""
+		if column:
+			self.column_solves += 1
+			numbers, boxes, crosses, length = self.column_numbers[index], self.column_boxes[index], self.column_crosses[index], self.height
+		else:
+			self.row_solves += 1
+			numbers, boxes, crosses, length = self.row_numbers[index], self.row_boxes[index], self.row_crosses[index], self.width
+		#a decided line can't change anymore, it only has to match its numbers
+		if boxes | crosses == (1 << length) - 1:
+			return set() if self.is_line_complete(index, column) else None
+		settled = settle_line(numbers, boxes, crosses, length)
+		if settled is None:
+			return None
+		new_boxes, new_crosses = settled[0] & ~boxes, settled[1] & ~crosses
+		if column:
+			self.column_boxes[index], self.column_crosses[index] = settled
+		else:
+			self.row_boxes[index], self.row_crosses[index] = settled
+		#keep the crossing lines in sync
+		crossing_boxes, crossing_crosses = (self.row_boxes, self.row_crosses) if column else (self.column_boxes, self.column_crosses)
+		changed = set()
+		for masks, new in ((crossing_boxes, new_boxes), (crossing_crosses, new_crosses)):
+			while new:
+				position = (new & -new).bit_length() - 1
+				masks[position] |= 1 << index
+				changed.add(position)
+				new &= new - 1
+		return changed
+
+	def propagate(self, callback: Callable = lambda *_: None) -> bool:
+		"""Solves lines until nothing changes anymore. Returns False if a contradiction was found.
+		The callback is called before every line solve, it may raise an exception to stop the propagation.
+		Every call starts with all rows and then alternates between rows and columns, there is no cache of solved lines."""
+		row_queue    = set(range(self.height))
+		column_queue = set(range(self.width))
+		while row_queue or column_queue:
+			for row in row_queue:
+				callback()
+				changed = self.solve_line(row)
+				if changed is None:
+					return False
+				column_queue.update(changed)
+			row_queue = set()
+			for column in column_queue:
+				callback()
+				changed = self.solve_line(column, True)
+				if changed is None:
+					return False
+				row_queue.update(changed)
+			column_queue = set()
+		return True
@@ -0,0 +1,177 @@
+"""
+	Puzzle generator: builds the numbers of a nonogram from a random board with a given share of boxes or from an image
+	and writes seeded corpora of many sizes as CSV files, labelled with the difficulty the solver finds.
+"""
+
+__all__ = ["DIFFICULTIES", "board_numbers", "random_board", "random_nonogram", "image_nonogram", "difficulty", "generate_corpus"]
+
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+#                                                        IMPORTS                                                       #
+# -------------------------------------------------------------------------------------------------------------------- #
+
+import os, json, time, argparse
+from multiprocessing import Pool
+from itertools import groupby
+from typing import Union
+
+import numpy as np
+
+from nonogram import Nonogram
+from nonogram_solver import NonogramSolver
+from batch_solver import solve_nonogram
+
+try:
+	from PIL import Image
+except ImportError:
+	Image = None
+
+#"propagation": solved by line solving alone, "probing-N": solved with assumptions of depth N,
+#"ambiguous": the numbers have more than one solution, "unsolved": not solved up to the maximum depth, "timeout": the time limit ran out first
+DIFFICULTIES = ("propagation", *(f"probing-{depth}" for depth in range(1, NonogramSolver.MAX_DEPTH + 1)), "ambiguous", "unsolved", "timeout")
+
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+#                                                       PUZZLES                                                        #
+# -------------------------------------------------------------------------------------------------------------------- #
+
+def board_numbers(solution: np.ndarray) -> tuple[list[list[int]], list[list[int]]]:
+	"""Returns the row and column numbers of a boolean board (True == box)."""
+	row_numbers = [[len(list(group)) for value, group in groupby(row) if value] for row in solution.tolist()]
+	column_numbers = [[len(list(group)) for value, group in groupby(column) if value] for column in solution.T.tolist()]
+	return row_numbers, column_numbers
+
+def _nonogram(solution: np.ndarray) -> Nonogram:
+	nonogram = Nonogram(None, solution.shape)
+	nonogram.row_numbers, nonogram.column_numbers = board_numbers(solution)
+	return nonogram
+
+def random_board(height: int, width: int, density: float = 0.55, seed: int = 0) -> np.ndarray:
+	"""Returns a boolean board on which every cell is a box with the probability density."""
+	return np.random.default_rng(seed).random((height, width)) < density
+
+def random_nonogram(height: int, width: int, density: float = 0.55, seed: int = 0) -> Nonogram:
+	"""Creates an unsolved nonogram whose numbers come from a random board with the given share of boxes."""
+	return _nonogram(random_board(height, width, density, seed))
+
+def image_nonogram(file: Union[str, bytes, os.PathLike], width: int, height: Union[int, None] = None, threshold: float = 0.5) -> Nonogram:
+	"""Creates an unsolved nonogram from an image (needs Pillow): it is scaled to width (and height, by default the aspect ratio is kept)
+	and every pixel darker than threshold (0 == black, 1 == white) becomes a box."""
+	if Image is None:
+		raise ImportError("Reading images needs the Pillow package.")
+	with Image.open(file) as image:
+		image = image.convert("L")
+		if height is None:
+			height = max(round(image.height * width / image.width), 1)
+		pixels = np.asarray(image.resize((width, height), Image.LANCZOS), np.float32) / 255
+	return _nonogram(pixels < threshold)
+
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+#                                                      DIFFICULTY                                                      #
+# -------------------------------------------------------------------------------------------------------------------- #
+
+def difficulty(nonogram: Nonogram, max_depth: int = 2, timeout: float = 0, options: Union[dict, None] = None, unique: bool = True) -> tuple[str, dict]:
+	"""Solves a copy of the puzzle with increasing assumption depths and returns one of DIFFICULTIES and the result of batch_solver.solve_nonogram.
+	The label comes from the lowest depth whose board matches every number. With unique the solutions are counted as well (within what is left
+	of the timeout): result["unique"] tells if there is exactly one (None if the time ran out) and a puzzle with more is labelled "ambiguous"."""
+	result = solve_nonogram(nonogram.copy(), max_depth, timeout, options)
+	if result["solved"]:
+		label = "propagation" if result["depth"] == 0 else f"probing-{result['depth']}"
+	else:
+		label = "timeout" if result.get("timeout") else "unsolved"
+	if unique:
+		remaining = timeout - result["time"] if timeout > 0 else 0
+		#line solving only decides cells that are the same in every solution
+		result["unique"] = True if label == "propagation" else None
+		if label != "propagation" and (timeout <= 0 or remaining > 0):
+			solver = NonogramSolver(nonogram.copy(), **(options or {}))
+			count, _ = solver.count_solutions(2, time_limit = remaining)
+			if count >= 2:
+				result["unique"] = False
+				label = "ambiguous"
+			elif solver.stopped_by is None:
+				result["unique"] = count == 1
+	return label, result
+
+def _corpus_task(task: tuple) -> dict:
+	file, height, width, density, seed, max_depth, timeout, unique = task
+	nonogram = random_nonogram(height, width, density, seed)
+	with open(file, "w") as f:
+		f.write(nonogram.to_csv())
+	label, result = difficulty(nonogram, max_depth, timeout, unique = unique)
+	return {
+		"file": os.path.basename(file),
+		"height": height,
+		"width": width,
+		"density": density,
+		"seed": seed,
+		"clues": sum(len(line) for line in nonogram.row_numbers + nonogram.column_numbers),
+		"difficulty": label,
+		"unique": result.get("unique"),
+		"time": result["time"],
+	}
+
+def generate_corpus(directory: Union[str, os.PathLike], sizes: list[tuple[int, int]], count: int = 5, densities: tuple[float, ...] = (0.55,), seed: int = 0,
+                    max_depth: int = 2, timeout: float = 10, jobs: int = 1, progress = None, unique: bool = True) -> list[dict]:
+	"""Writes count puzzles for every size and density as CSV files into directory and labels them with their difficulty (see difficulty for unique).
+	The same seed always gives the same corpus. An index of every puzzle (size, density, seed, amount of clues, difficulty, uniqueness, solve time)
+	is written to corpus.json and returned, progress is called with every entry as soon as it is finished."""
+	os.makedirs(directory, exist_ok = True)
+	tasks = []
+	for height, width in sizes:
+		for density in densities:
+			for i in range(count):
+				puzzle_seed = seed + i
+				file = os.path.join(directory, f"random{height}x{width}_d{round(density * 100):02d}_s{puzzle_seed}.csv")
+				tasks.append((file, height, width, density, puzzle_seed, max_depth, timeout, unique))
+	with Pool(max(jobs, 1)) as pool:
+		index = []
+		for entry in pool.imap(_corpus_task, tasks):
+			index.append(entry)
+			if progress is not None:
+				progress(entry)
+	with open(os.path.join(directory, "corpus.json"), "w") as f:
+		json.dump({"seed": seed, "max_depth": max_depth, "timeout": timeout, "created": time.strftime("%Y-%m-%dT%H:%M:%S"), "puzzles": index}, f, indent = "\t")
+	return index
+
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+#                                                         MAIN                                                         #
+# -------------------------------------------------------------------------------------------------------------------- #
+
+def _size(text: str) -> tuple[int, int]:
+	height, _, width = text.lower().partition("x")
+	return int(height), int(width or height)
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description = "Generates nonogram puzzles as CSV files, either a labelled corpus of random puzzles or a single puzzle from an image.")
+	parser.add_argument("output", help = "directory of the corpus or, with --image, the CSV file to write")
+	parser.add_argument("--image", dest = "image", help = "creates a single puzzle from this image (needs Pillow)")
+	parser.add_argument("--width", dest = "width", type = int, default = 30, help = "width of the puzzle created from the image")
+	parser.add_argument("--height", dest = "height", type = int, help = "height of the puzzle created from the image (default: keeps the aspect ratio)")
+	parser.add_argument("--sizes", dest = "sizes", nargs = "+", type = _size, default = [(10, 10), (20, 20), (50, 50), (100, 100), (200, 200)], metavar = "SIZE", help = "puzzle sizes as N or HEIGHTxWIDTH (default: 10 20 50 100 200)")
+	parser.add_argument("-n", "--count", dest = "count", type = int, default = 5, help = "puzzles per size and density")
+	parser.add_argument("--densities", dest = "densities", nargs = "+", type = float, default = [0.55], help = "shares of boxes of the random boards")
+	parser.add_argument("--threshold", dest = "threshold", type = float, default = 0.5, help = "brightness below which a pixel of the image becomes a box")
+	parser.add_argument("--seed", dest = "seed", type = int, default = 0, help = "seed of the first puzzle, the following ones count up")
+	parser.add_argument("-d", "--depth", dest = "depth", type = int, choices = range(NonogramSolver.MAX_DEPTH + 1), default = 2, help = "maximum assumption depth used for the difficulty labels")
+	parser.add_argument("--timeout", dest = "timeout", type = float, default = 10, metavar = "SECONDS", help = "time limit per puzzle for the difficulty labels, 0 means no limit")
+	parser.add_argument("--no-unique-check", dest = "unique", action = "store_false", help = "skips counting the solutions, puzzles with several solutions aren't labelled ambiguous then")
+	parser.add_argument("-j", "--jobs", dest = "jobs", type = int, default = 0, help = "amount of worker processes (default: one per CPU)")
+	args = parser.parse_args()
+
+	if args.image:
+		nonogram = image_nonogram(args.image, args.width, args.height, args.threshold)
+		with open(args.output, "w") as f:
+			f.write(nonogram.to_csv())
+		label, _ = difficulty(nonogram, args.depth, args.timeout, unique = args.unique)
+		print(f"{args.output}: {nonogram.board.shape[0]}x{nonogram.board.shape[1]}, {label}")
+	else:
+		def print_entry(entry: dict):
+			print(f"{entry['file']:<32} {entry['clues']:6d} clues  {entry['difficulty']:<12} {entry['time']:10.6f}s", flush = True)
+		generate_corpus(args.output, args.sizes, args.count, args.densities, args.seed, args.depth, args.timeout, args.jobs or os.cpu_count(), print_entry, args.unique)
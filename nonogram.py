@@ -10,6 +10,7 @@ import numpy as np
 
 ALPHABET_SIZE = 3
 EMPTY, CROSS, BOX = range(ALPHABET_SIZE)
+SYMBOLS = " ×▯" #one character per cell value, used for the plain text form of a board
 
 
 
@@ -99,6 +100,19 @@ class Nonogram:
 		result += " " * left_spacing + "└" + "───"*self.board.shape[1] + "┘\n" #bottom bar
 		return result
 	
+	def to_text(self) -> str:
+		"""Returns the board as plain text, one line per row (' ' == empty, '×' == cross, '▯' == box)."""
+		return "\n".join("".join(SYMBOLS[cell] for cell in row) for row in self.board.tolist())
+	
+	def to_csv(self) -> str:
+		"""Returns the numbers in the CSV file format: the column numbers (one line per position, top aligned), a separator line and one line per row.
+		Empty lines are written as 0."""
+		column_lines = []
+		for i in range(max(max((len(column) for column in self.column_numbers), default = 0), 1)):
+			column_lines.append(",".join(str(column[i]) if i < len(column) else ("0" if i == 0 else " ") for column in self.column_numbers))
+		row_lines = [",".join(str(n) for n in row) if row else "0" for row in self.row_numbers]
+		return "\n".join(column_lines + ["#" * len(column_lines[0])] + row_lines) + "\n"
+	
 	def __eq__(self, __o: object) -> bool:
 		return isinstance(__o, Nonogram) and (self.board == __o.board).all() and self.row_numbers == __o.row_numbers and self.column_numbers == __o.column_numbers
 	
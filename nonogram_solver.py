@@ -1,8 +1,8 @@
 """
-	If you just want to see the algorithm used, see lines 55 to 234.
+	If you just want to see the algorithm used, see the PROCESSING section of the NonogramSolver class, NonogramSolver.solve at its end ties the steps together.
 """
 
-__all__ = ["NonogramSolver"]
+__all__ = ["NonogramSolver", "LineCache", "LineIndex", "ProbeStore", "SolverStats"]
 
 
 
@@ -10,15 +10,21 @@ __all__ = ["NonogramSolver"]
 #                                                        IMPORTS                                                       #
 # -------------------------------------------------------------------------------------------------------------------- #
 
-import os, time, argparse, profile, pstats
-from multiprocessing import Pool, Queue
+import os, time, json, heapq, argparse, threading, contextlib, profile, pstats
+from multiprocessing import Pool, Queue, Value, Array, TimeoutError as PoolTimeoutError
 from typing import Union, Callable
+from collections import OrderedDict
 from collections.abc import Iterator
 
 os.environ["NUMPY_EXPERIMENTAL_ARRAY_FUNCTION"] = "0" #implement_array_function takes much time (see profiler): https://stackoverflow.com/questions/61983372/is-built-in-method-numpy-core-multiarray-umath-implement-array-function-a-per
 import numpy as np
 
 from nonogram import Nonogram, EMPTY, CROSS, BOX
+from bitboard import BitNonogram, array_to_mask, leftmost_placement
+from sat_solver import NonogramCNF, solve_cnf
+from result_store import ResultStore
+
+UNDECIDED, CONTRADICTION, SOLVED = range(3)
 
 
 
@@ -53,10 +59,249 @@ def rle_between_crosses(array: np.ndarray) -> list[int]:
 
 
 
+# -------------------------------------------------------------------------------------------------------------------- #
+#                                                   LINE CACHE CLASS                                                   #
+# -------------------------------------------------------------------------------------------------------------------- #
+
+class LineCache:
+	"""Least recently used cache of solved lines, keyed by the numbers of a line and the bytes of its cells.
+	
+	Attributes:
+		size (int): Maximum amount of cached lines.
+		hits (int): Amount of lines that were answered from the cache.
+		misses (int): Amount of lines that had to be solved.
+	"""
+	DEFAULT_SIZE = 65536
+
+	def __init__(self, size: int = DEFAULT_SIZE):
+		self.size = size
+		self.hits = self.misses = 0
+		self.__entries: OrderedDict[tuple, tuple[tuple[int, ...], bytes]] = OrderedDict()
+
+	def __len__(self) -> int:
+		return len(self.__entries)
+
+	def __repr__(self) -> str:
+		return "LineCache ({}/{} lines, {} hits, {} misses)".format(len(self), self.size, self.hits, self.misses)
+
+	@staticmethod
+	def key(numbers: list[int], line: np.ndarray) -> tuple:
+		return tuple(numbers), line.tobytes()
+
+	def get(self, key: tuple) -> Union[tuple[tuple[int, ...], bytes], None]:
+		"""Returns the changed indeces and the solved cells of a line or None if the line is unknown."""
+		entry = self.__entries.get(key)
+		if entry is None:
+			self.misses += 1
+			return None
+		self.hits += 1
+		self.__entries.move_to_end(key)
+		return entry
+
+	def put(self, key: tuple, changed_indeces: set[int], line: np.ndarray):
+		self.__entries[key] = tuple(changed_indeces), line.tobytes()
+		self.__entries.move_to_end(key)
+		while len(self.__entries) > self.size:
+			self.__entries.popitem(last = False)
+
+	def resize(self, size: int):
+		"""Changes the maximum amount of cached lines and evicts the least recently used ones if necessary."""
+		self.size = size
+		while len(self.__entries) > self.size:
+			self.__entries.popitem(last = False)
+
+	def clear(self):
+		self.__entries.clear()
+		self.hits = self.misses = 0
+
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+#                                                   LINE INDEX CLASS                                                   #
+# -------------------------------------------------------------------------------------------------------------------- #
+
+class LineIndex:
+	"""Feasibility state of every line, keyed by (column, index): a placement of the line's numbers that agrees with its known cells.
+	As long as every changed cell of a line agrees with its placement, the line is still solvable and nothing has to be calculated,
+	otherwise the leftmost placement is searched again.\n
+	Cells that change without being checked (assumptions, forced cells, other board engines) must be passed to invalidate.
+	Emptying cells never breaks a placement, so rolling back an assumption needs no update.
+	
+	Attributes:
+		hits (int): Checks answered by a stored placement.
+		misses (int): Checks that had to search a new placement.
+	"""
+	def __init__(self):
+		self.hits = self.misses = 0
+		self.__placements: dict[tuple[bool, int], int] = {}
+
+	def __len__(self) -> int:
+		return len(self.__placements)
+
+	def __repr__(self) -> str:
+		return "LineIndex ({} lines, {} hits, {} misses)".format(len(self), self.hits, self.misses)
+
+	def check(self, column: bool, index: int, numbers: list[int], line: np.ndarray, position: int) -> bool:
+		"""Checks if a line is still solvable after its cell at position changed."""
+		placement = self.__placements.get((column, index))
+		if placement is not None and (placement >> position & 1) == (line[position] == BOX):
+			self.hits += 1
+			return True
+		return self.__place(column, index, numbers, line)
+
+	def check_line(self, column: bool, index: int, numbers: list[int], line: np.ndarray) -> bool:
+		"""Checks if a line is solvable, a new placement is only searched if the line has none."""
+		if (column, index) in self.__placements:
+			self.hits += 1
+			return True
+		return self.__place(column, index, numbers, line)
+
+	def __place(self, column: bool, index: int, numbers: list[int], line: np.ndarray) -> bool:
+		self.misses += 1
+		placement = leftmost_placement(list(numbers), array_to_mask(line == BOX), array_to_mask(line == CROSS), line.size)
+		if placement is None:
+			self.__placements.pop((column, index), None)
+			return False
+		self.__placements[column, index] = placement
+		return True
+
+	def invalidate(self, cell: tuple[int, int]):
+		"""Forgets the placements of the row and the column of a cell."""
+		self.__placements.pop((False, cell[0]), None)
+		self.__placements.pop((True, cell[1]), None)
+
+	def clear(self):
+		self.__placements.clear()
+		self.hits = self.misses = 0
+
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+#                                                   PROBE STORE CLASS                                                  #
+# -------------------------------------------------------------------------------------------------------------------- #
+
+class ProbeStore:
+	"""Outcomes of the assumptions of one disproof level, keyed by (flat cell index, value). The board of a level only gains cells.\n
+	A contradiction stays a contradiction on a board with more cells. An undecided assumption keeps the cells its propagation implied:
+	as long as every cell that changed since agrees with them, the propagation would end on the same board and the outcome is the same.
+	Changes of the board must be passed to changed.
+	
+	Attributes:
+		hits (int): Assumptions answered by a stored outcome.
+		misses (int): Assumptions that had to be tried.
+	"""
+	def __init__(self):
+		self.hits = self.misses = 0
+		self.__changes: list[tuple[int, int]] = [] #(flat index, value) of every changed cell in order
+		self.__outcomes: dict[tuple[int, int], tuple[int, int, dict[int, int]]] = {} #outcome, amount of changes at that time, implied cells
+
+	def __len__(self) -> int:
+		return len(self.__outcomes)
+
+	def __repr__(self) -> str:
+		return "ProbeStore ({} assumptions, {} hits, {} misses)".format(len(self), self.hits, self.misses)
+
+	def get(self, cell: int, value: int) -> Union[int, None]:
+		"""Returns the stored outcome of an assumption or None if it has to be tried (again)."""
+		entry = self.__outcomes.get((cell, value))
+		if entry is not None:
+			outcome, changes, implied = entry
+			if outcome == CONTRADICTION or all(implied.get(index) == new_value for index, new_value in self.__changes[changes:]):
+				self.hits += 1
+				return outcome
+			del self.__outcomes[cell, value]
+		self.misses += 1
+		return None
+
+	@property
+	def version(self) -> int:
+		"""Amount of changes so far, identifies the board an assumption was tried on."""
+		return len(self.__changes)
+
+	def put(self, cell: int, value: int, outcome: int, implied: dict[int, int], version: Union[int, None] = None):
+		"""Stores the outcome of an assumption together with the cells (flat index: value) its propagation decided.
+		version is the one of the board the assumption was tried on, by default the current board."""
+		self.__outcomes[cell, value] = outcome, self.version if version is None else version, implied
+
+	def implied(self, cell: int, value: int) -> Union[dict[int, int], None]:
+		"""Returns the cells a stored assumption decided or None if it isn't stored."""
+		entry = self.__outcomes.get((cell, value))
+		return entry[2] if entry is not None else None
+
+	def changed(self, cells: np.ndarray, board: np.ndarray):
+		"""Adds cells (flat indeces) that got decided on the board of the level."""
+		self.__changes.extend(zip(cells.tolist(), board.flat[cells].tolist()))
+
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+#                                                   STATISTICS CLASS                                                   #
+# -------------------------------------------------------------------------------------------------------------------- #
+
+class SolverStats:
+	"""Counters of a single NonogramSolver.solve call, only collected if it is called with stats = True.
+	
+	Attributes:
+		row_solves (int): Solved rows, including answers from the line cache.
+		column_solves (int): Solved columns, including answers from the line cache.
+		placements (int): Valid number positions (settle) or complete line placements (permutation) the line solvers looked at (not counted by the bitset engine).
+		propagation_cells (int): Cells decided by solving lines before any assumption was made.
+		probing_cells (int): Cells decided because an assumption led to a contradiction, including the following line solves.
+		probes (int): Assumptions that were tried.
+		probe_hits (int): Assumptions that weren't tried again because their stored outcome was still valid, see ProbeStore.
+		contradictions (int): Assumptions that led to a contradiction.
+		phase_times (dict[str, float]): Seconds spent in every phase of the solver.
+	"""
+	def __init__(self):
+		self.row_solves = self.column_solves = self.placements = 0
+		self.propagation_cells = self.probing_cells = 0
+		self.probes = self.probe_hits = self.contradictions = 0
+		self.phase_times: dict[str, float] = {}
+		self.probing = False #decided cells are counted as probing cells while this is set
+
+	@property
+	def line_solves(self) -> int:
+		return self.row_solves + self.column_solves
+
+	def add_time(self, phase: str, seconds: float):
+		self.phase_times[phase] = self.phase_times.get(phase, 0.0) + seconds
+
+	def to_dict(self) -> dict:
+		return {
+			"line_solves": self.line_solves,
+			"row_solves": self.row_solves,
+			"column_solves": self.column_solves,
+			"placements": self.placements,
+			"propagation_cells": self.propagation_cells,
+			"probing_cells": self.probing_cells,
+			"probes": self.probes,
+			"probe_hits": self.probe_hits,
+			"contradictions": self.contradictions,
+			"phase_times": {phase: round(seconds, 6) for phase, seconds in self.phase_times.items()},
+		}
+
+	def to_json(self) -> str:
+		return json.dumps(self.to_dict(), indent = "\t")
+
+	def __str__(self) -> str:
+		result  = f"Line solves:       {self.line_solves} ({self.row_solves} rows, {self.column_solves} columns)\n"
+		result += f"Placements:        {self.placements}\n"
+		result += f"Decided cells:     {self.propagation_cells} by propagation, {self.probing_cells} by probing\n"
+		result += f"Probes:            {self.probes} ({self.contradictions} contradictions, {self.probe_hits} answered from the probe store)\n"
+		for phase, seconds in self.phase_times.items():
+			result += f"Time {phase + ':':<13} {seconds:11.6f} seconds\n"
+		return result
+
+
+
 # -------------------------------------------------------------------------------------------------------------------- #
 #                                                 NONOGRAMMSOLVER CLASS                                                #
 # -------------------------------------------------------------------------------------------------------------------- #
 
+class _LimitReached(Exception):
+	"""Stops NonogramSolver.solve, the argument is the name of the limit."""
+	pass
+
 class NonogramSolver:
 	"""This class solves a nonogram puzzle using a multiplicity of methods.
 	
@@ -65,9 +310,72 @@ class NonogramSolver:
 		board (np.ndarray^2): The nonogram puzzle (0 == empty, 1 == cross, 2 == box).
 	"""
 	MAX_DEPTH = 4
+	LIMITS = ("time", "line_solves", "probes", "cancelled")
+	PROGRESS_INTERVAL = 0.1 #seconds between two progress events
+	CHECKPOINT_INTERVAL = 60.0 #default seconds between two checkpoints
+	CHECKPOINT_VERSION = 1
+	LINE_SOLVERS = ("settle", "permutation")
+	BOARD_ENGINES = ("array", "bitset")
+	SCHEDULES = ("priority", "alternating")
+	SEARCHES = ("trail", "copy")
+	ENGINES = ("probing", "sat")
+	PROBE_ORDERS = ("row-major", "heuristic", "random")
+	PROBE_JITTER = 0.5 #random share of the heuristic probe score, see __probe_cells
 
-	def __init__(self, from_board_or_filename: Union[Nonogram, str, bytes, os.PathLike]):
-		"""Reads the input file and initializes the nonogram puzzle."""
+	def __init__(self, from_board_or_filename: Union[Nonogram, str, bytes, os.PathLike], line_solver: str = "settle", board_engine: str = "array", cache_size: int = LineCache.DEFAULT_SIZE, schedule: str = "priority", search: str = "trail", prepass: bool = True, reduce: bool = True,
+	             probe_order: str = "row-major", seed: int = 0):
+		"""Reads the input file and initializes the nonogram puzzle.\n
+		The line solver is either "settle" (dynamic programming, default) or "permutation" (enumerates every placement, reference implementation).
+		The board engine used for propagation is either "array" (numpy board, default) or "bitset" (row and column bitmasks, see bitboard.py).
+		The bitset engine always starts with every line and alternates between rows and columns, it uses neither the schedule nor the line cache,
+		and its statistics have no placements.
+		Solved lines of the array engine are kept in a LineCache with cache_size entries, 0 disables the cache.
+		The schedule decides the order of the line solves, either "priority" (most constrained line first, default) or "alternating" (all rows, then all columns).
+		The search of the disproof method either changes the board in place and rolls failed assumptions back ("trail", default) or works on copies of the board ("copy").
+		With prepass the simple rules are applied to the whole board at once before the first line solve.
+		With reduce the assumptions (or the SAT engine) only see the unsolved core of the board, solved margins are peeled off.
+		The probe order decides which empty cells the disproof method tries first: "row-major" (default), "heuristic" (cells on nearly solved lines,
+		next to boxes and on lines whose remaining boxes are nearly all or nearly none of their empty cells first, with some seeded jitter)
+		or "random" (shuffled with seed)."""
+		if line_solver not in NonogramSolver.LINE_SOLVERS:
+			raise ValueError(f"Unknown line solver '{line_solver}', choose from {', '.join(NonogramSolver.LINE_SOLVERS)}.")
+		if board_engine not in NonogramSolver.BOARD_ENGINES:
+			raise ValueError(f"Unknown board engine '{board_engine}', choose from {', '.join(NonogramSolver.BOARD_ENGINES)}.")
+		if schedule not in NonogramSolver.SCHEDULES:
+			raise ValueError(f"Unknown schedule '{schedule}', choose from {', '.join(NonogramSolver.SCHEDULES)}.")
+		if search not in NonogramSolver.SEARCHES:
+			raise ValueError(f"Unknown search '{search}', choose from {', '.join(NonogramSolver.SEARCHES)}.")
+		if probe_order not in NonogramSolver.PROBE_ORDERS:
+			raise ValueError(f"Unknown probe order '{probe_order}', choose from {', '.join(NonogramSolver.PROBE_ORDERS)}.")
+		self.line_solver = line_solver
+		self.board_engine = board_engine
+		self.line_cache = LineCache(cache_size) if cache_size > 0 else None
+		self.line_index = LineIndex()
+		self.schedule = schedule
+		self.search = search
+		self.prepass = prepass
+		self.reduce = reduce
+		self.probe_order = probe_order
+		self.seed = seed
+		self.__random = np.random.default_rng(seed)
+		self.line_solves = 0
+		self.probes = 0
+		self.stopped_by: Union[str, None] = None #one of LIMITS if the last solve call ran into a limit
+		self.from_store = False #True if the last solve call was answered by a ResultStore
+		self.__search: Union[tuple[Nonogram, Union[tuple[slice, slice], None]], None] = None #board of the running search and its region, see decided_share
+		self.unsolvable = False #True if the last solve call found a line that can't agree with its numbers anymore
+		self.stats: Union[SolverStats, None] = None
+		self.__deadline: Union[float, None] = None
+		self.__max_line_solves = self.__max_probes = 0
+		self.__cancel: Union[threading.Event, None] = None
+		self.__schedule_lines: Union[tuple, None] = None #see __propagate_priority
+		self.__assumptions = 0 #nesting level of the current assumption, 0 outside of the disproof method
+		#every cell change since the start of the search as flat board index, only used by the trail search
+		self.__trail: Union[list[int], None] = [] if search == "trail" else None
+		self.__trail_base = 0 #length of the trail before the outermost assumption, the cells after it aren't decided for good
+		self.__scan: list[int] = [] #cells the outermost disproof scan tried without result since the last forced cell
+		self.__resume_scan: set[int] = set() #cells of a checkpoint that the first outermost scan skips, see load_checkpoint
+		self.__resume_depth = 0 #depth of the checkpoint, the cells are only skipped at the same depth
 		self.__start_time = self.__end_time = time.perf_counter_ns()
 		self.__waiting_message_shown = False
 		if isinstance(from_board_or_filename, Nonogram):
@@ -126,19 +434,15 @@ class NonogramSolver:
 		#try fitting from reverse is necessary because some of the following nonassigned boxgroups can prevent the fitting of the last number(s)
 		#(1, 2), [ ×  ×▯×]
 	
-	@staticmethod
-	def __check_board_solvability(nonogram: Nonogram) -> bool:
-		#print("Row solvability:")
-		#print([NonogramSolver.__check_line_solvability(numbers, line) for numbers, line in zip(nonogram.row_numbers, nonogram.board)])
-		#print("Column solvability:")
-		#print([NonogramSolver.__check_line_solvability(numbers, line) for numbers, line in zip(nonogram.column_numbers, nonogram.board.T)])
-		return all(NonogramSolver.__check_line_solvability(numbers, line) for numbers, line in zip(nonogram.row_numbers, nonogram.board)) and all(NonogramSolver.__check_line_solvability(numbers, line) for numbers, line in zip(nonogram.column_numbers, nonogram.board.T))
+	def __check_board_solvability(self, nonogram: Nonogram) -> bool:
+		"""Checks if every row and column can still be solved. Only lines without a placement in the line index are calculated."""
+		return all(self.line_index.check_line(False, row, numbers, line) for row, (numbers, line) in enumerate(zip(nonogram.row_numbers, nonogram.board))) and all(self.line_index.check_line(True, column, numbers, line) for column, (numbers, line) in enumerate(zip(nonogram.column_numbers, nonogram.board.T)))
 	
 	@staticmethod
 	def __check_board_solved(nonogram: Nonogram) -> bool:
 		if np.any(nonogram.board == EMPTY):
 			return False
-		return NonogramSolver.__check_board_solvability(nonogram)
+		return all(rle_box_lengths(line) == list(numbers) for numbers, line in zip(nonogram.row_numbers, nonogram.board)) and all(rle_box_lengths(line) == list(numbers) for numbers, line in zip(nonogram.column_numbers, nonogram.board.T))
 	
 	@staticmethod
 	def __find_next_box(line: np.ndarray, line_start_at: int = 0) -> int:
@@ -213,9 +517,12 @@ class NonogramSolver:
 	"""
 
 	@staticmethod
-	def __solve_line(numbers: list[int], line: np.ndarray) -> set[int]:
-		"""Solves a single row or column of the nonogram puzzle."""
+	def __solve_line_permutation(numbers: list[int], line: np.ndarray, stats: Union[SolverStats, None] = None) -> set[int]:
+		"""Solves a single row or column of the nonogram puzzle by enumerating every placement of its numbers.\n
+		This is the reference implementation, its memory and time usage grow exponentially with the amount of numbers."""
 		permutations = list(NonogramSolver.__get_permutations(numbers, line))
+		if stats is not None:
+			stats.placements += len(permutations)
 		if not permutations:
 			return set()
 		transposed_stack = np.column_stack(permutations)
@@ -246,7 +553,286 @@ class NonogramSolver:
 		return changed_indeces
 	
 	@staticmethod
-	def __solve_permutation(nonogram: Nonogram, time_update_callback: Callable = lambda *_: None) -> bool:
+	def __solve_line_settle(numbers: list[int], line: np.ndarray, stats: Union[SolverStats, None] = None) -> set[int]:
+		"""Solves a single row or column of the nonogram puzzle without enumerating the placements of its numbers.\n
+		forward[j][i] tells if the first j numbers fit into the first i cells, backward[j][i] tells if the numbers from j on fit into the cells from i on.
+		A cell is a box if no fitting leaves it out and a cross if no fitting covers it. Runs in O(len(numbers) * len(line))."""
+		cells = line.tolist()
+		n, k = len(cells), len(numbers)
+		#crosses[i] is the amount of crosses in cells[:i], so a block fits between a and b if crosses[b] == crosses[a]
+		crosses = [0] * (n + 1)
+		for i, cell in enumerate(cells):
+			crosses[i + 1] = crosses[i] + (cell == CROSS)
+
+		forward = [[False] * (n + 1) for _ in range(k + 1)]
+		forward[0][0] = True
+		for i in range(1, n + 1):
+			forward[0][i] = forward[0][i - 1] and cells[i - 1] != BOX
+		for j in range(1, k + 1):
+			number, current, previous = numbers[j - 1], forward[j], forward[j - 1]
+			for i in range(number, n + 1):
+				#either the last cell is free or the j-th number ends there
+				if current[i - 1] and cells[i - 1] != BOX:
+					current[i] = True
+				elif crosses[i] == crosses[i - number]:
+					start = i - number
+					current[i] = previous[0] if start == 0 else cells[start - 1] != BOX and previous[start - 1]
+		if not forward[k][n]:
+			return set()
+
+		backward = [[False] * (n + 1) for _ in range(k + 1)]
+		backward[k][n] = True
+		for i in range(n - 1, -1, -1):
+			backward[k][i] = backward[k][i + 1] and cells[i] != BOX
+		for j in range(k - 1, -1, -1):
+			number, current, following = numbers[j], backward[j], backward[j + 1]
+			for i in range(n - number, -1, -1):
+				#either the first cell is free or the j-th number starts there
+				if current[i + 1] and cells[i] != BOX:
+					current[i] = True
+				elif crosses[i + number] == crosses[i]:
+					end = i + number
+					current[i] = following[n] if end == n else cells[end] != BOX and following[end + 1]
+
+		#mark every cell that can be covered by a box, using a difference array over all valid block positions
+		box_coverage = [0] * (n + 1)
+		placements = 0
+		for j, number in enumerate(numbers):
+			before, after = forward[j], backward[j + 1]
+			for start in range(n - number + 1):
+				end = start + number
+				if crosses[end] != crosses[start]:
+					continue
+				if not (before[0] if start == 0 else cells[start - 1] != BOX and before[start - 1]):
+					continue
+				if not (after[n] if end == n else cells[end] != BOX and after[end + 1]):
+					continue
+				box_coverage[start] += 1
+				box_coverage[end] -= 1
+				placements += 1
+		if stats is not None:
+			stats.placements += placements
+
+		changed_indeces = set()
+		coverage = 0
+		for i, cell in enumerate(cells):
+			coverage += box_coverage[i]
+			if cell != EMPTY:
+				continue
+			if coverage == 0:
+				line[i] = CROSS
+				changed_indeces.add(i)
+			elif not any(forward[j][i] and backward[j][i + 1] for j in range(k + 1)):
+				line[i] = BOX
+				changed_indeces.add(i)
+		return changed_indeces
+
+	@staticmethod
+	def __pad_numbers(numbers: list[list[int]]) -> tuple[np.ndarray, np.ndarray]:
+		"""Returns the numbers of all lines as a matrix padded with zeros and the amount of numbers of every line."""
+		counts = np.array([len(line_numbers) for line_numbers in numbers], int)
+		padded = np.zeros((len(numbers), max(1, counts.max(initial = 0))), int)
+		for i, line_numbers in enumerate(numbers):
+			padded[i, :len(line_numbers)] = line_numbers
+		return padded, counts
+
+	@staticmethod
+	def __apply_simple_rules(board: np.ndarray, numbers: np.ndarray, counts: np.ndarray, dirty: np.ndarray) -> np.ndarray:
+		"""Applies the simple rules to every dirty line (the rows of board) at once. Returns the changed cells.\n
+		The rules only look at the part of a line between its outer crosses:
+		- overlap: cells that every number covers both in its leftmost and in its rightmost position are boxes
+		- edges: if that part starts or ends with a box, the first or last number is placed there and followed by a cross
+		- complete: if all boxes are placed, the empty cells are crosses
+		Cells that get both a box and a cross belong to a contradicting line and are left for the line solver."""
+		changed = np.zeros(board.shape, bool)
+		indeces = dirty.nonzero()[0]
+		if indeces.size == 0:
+			return changed
+		lines, numbers, counts = board[indeces], numbers[indeces], counts[indeces]
+		length = board.shape[1]
+		cells = np.arange(length)
+		#part of the line between the outer crosses
+		free = lines != CROSS
+		has_free = free.any(axis = 1)
+		start = np.where(has_free, free.argmax(axis = 1), length)
+		end = np.where(has_free, length - free[:, ::-1].argmax(axis = 1), length)
+
+		j = np.arange(numbers.shape[1])
+		valid = j < counts[:, None]
+		before = np.cumsum(numbers, axis = 1) - numbers #sum of the previous numbers
+		after = numbers.sum(axis = 1)[:, None] - before - numbers #sum of the following numbers
+		leftmost_end = start[:, None] + before + j + numbers
+		rightmost_start = end[:, None] - after - (counts[:, None] - 1 - j) - numbers
+		boxes = ((cells >= rightmost_start[..., None]) & (cells < leftmost_end[..., None]) & valid[..., None]).any(axis = 1)
+
+		lines_range = np.arange(len(lines))
+		first = numbers[:, 0]
+		last = numbers[lines_range, np.maximum(counts - 1, 0)]
+		starts_with_box = has_free & (counts > 0) & (lines[lines_range, np.minimum(start, length - 1)] == BOX)
+		ends_with_box = has_free & (counts > 0) & (lines[lines_range, np.maximum(end - 1, 0)] == BOX)
+		boxes |= starts_with_box[:, None] & (cells >= start[:, None]) & (cells < (start + first)[:, None])
+		boxes |= ends_with_box[:, None] & (cells >= (end - last)[:, None]) & (cells < end[:, None])
+		crosses = starts_with_box[:, None] & (cells == (start + first)[:, None])
+		crosses |= ends_with_box[:, None] & (cells == (end - last - 1)[:, None])
+		crosses |= ((lines == BOX).sum(axis = 1) == numbers.sum(axis = 1))[:, None]
+
+		empty = lines == EMPTY
+		new_boxes = boxes & ~crosses & empty
+		new_crosses = crosses & ~boxes & empty
+		lines[new_boxes] = BOX
+		lines[new_crosses] = CROSS
+		board[indeces] = lines
+		changed[indeces] = new_boxes | new_crosses
+		return changed
+
+	def __solve_simple_rules(self, nonogram: Nonogram):
+		"""Vectorized prepass: applies the simple rules to all dirty rows, then to all dirty columns and so on until nothing changes anymore."""
+		row_numbers, row_counts = NonogramSolver.__pad_numbers(nonogram.row_numbers)
+		column_numbers, column_counts = NonogramSolver.__pad_numbers(nonogram.column_numbers)
+		dirty_rows = np.ones(nonogram.board.shape[0], bool)
+		dirty_columns = np.ones(nonogram.board.shape[1], bool)
+		while dirty_rows.any() or dirty_columns.any():
+			row_changes = NonogramSolver.__apply_simple_rules(nonogram.board, row_numbers, row_counts, dirty_rows)
+			dirty_columns |= row_changes.any(axis = 0)
+			column_changes = NonogramSolver.__apply_simple_rules(nonogram.board.T, column_numbers, column_counts, dirty_columns).T
+			dirty_rows = column_changes.any(axis = 1)
+			dirty_columns[:] = False
+			changed_cells = np.flatnonzero(row_changes | column_changes).tolist()
+			if self.__trail is not None:
+				self.__trail.extend(changed_cells)
+			if self.stats is not None:
+				self.__count_decided_cells(len(changed_cells))
+
+	@staticmethod
+	def __reduce_board(nonogram: Nonogram) -> Union[tuple[Nonogram, tuple[slice, slice]], None]:
+		"""Peels the solved margins off the board. Returns the remaining core as a nonogram of its own and its region on the board,
+		or None if there is nothing to peel off (or the margins contradict the numbers, which the full search finds anyway).\n
+		The core is the bounding box of the empty cells. It grows until every core line has a cross (or the edge) next to it,
+		so the margins of a core line hold complete runs, whose numbers are removed from the line."""
+		height, width = nonogram.board.shape
+		empty = nonogram.board == EMPTY
+		rows, columns = np.flatnonzero(empty.any(axis = 1)), np.flatnonzero(empty.any(axis = 0))
+		if rows.size == 0:
+			return None
+		top, bottom, left, right = int(rows[0]), int(rows[-1]) + 1, int(columns[0]), int(columns[-1]) + 1
+		box = nonogram.board == BOX
+		while True:
+			if left > 0 and box[top:bottom, left - 1].any():
+				left -= 1
+			elif right < width and box[top:bottom, right].any():
+				right += 1
+			elif top > 0 and box[top - 1, left:right].any():
+				top -= 1
+			elif bottom < height and box[bottom, left:right].any():
+				bottom += 1
+			else:
+				break
+		if (top, bottom, left, right) == (0, height, 0, width):
+			return None
+		def core_numbers(numbers: list[int], line: np.ndarray, start: int, end: int) -> Union[list[int], None]:
+			before, after = rle_box_lengths(line[:start]), rle_box_lengths(line[end:])
+			if len(before) + len(after) > len(numbers) or list(numbers[:len(before)]) != before or list(numbers[len(numbers) - len(after):]) != after:
+				return None
+			return list(numbers[len(before):len(numbers) - len(after)])
+		core = Nonogram(None, (bottom - top, right - left))
+		core.board = nonogram.board[top:bottom, left:right].copy()
+		core.row_numbers = [core_numbers(nonogram.row_numbers[i], nonogram.board[i], left, right) for i in range(top, bottom)]
+		core.column_numbers = [core_numbers(nonogram.column_numbers[j], nonogram.board[:, j], top, bottom) for j in range(left, right)]
+		if None in core.row_numbers or None in core.column_numbers:
+			return None
+		return core, (slice(top, bottom), slice(left, right))
+
+	def __check_limits(self):
+		"""Raises _LimitReached if the solve was cancelled, the deadline passed or the line solve budget is used up."""
+		if self.__cancel is not None and self.__cancel.is_set():
+			raise _LimitReached("cancelled")
+		if self.__deadline is not None and time.perf_counter() > self.__deadline:
+			raise _LimitReached("time")
+		if self.__max_line_solves and self.line_solves >= self.__max_line_solves:
+			raise _LimitReached("line_solves")
+
+	def __count_probe(self):
+		if self.__max_probes and self.probes >= self.__max_probes:
+			raise _LimitReached("probes")
+		self.probes += 1
+
+	def __solve_line(self, numbers: list[int], line: np.ndarray) -> set[int]:
+		"""Solves a single row or column of the nonogram puzzle with the selected line solver, answers from the line cache if possible."""
+		self.__check_limits()
+		self.line_solves += 1
+		if self.line_cache is not None:
+			key = LineCache.key(numbers, line)
+			entry = self.line_cache.get(key)
+			if entry is not None:
+				changed_indeces, cells = entry
+				if changed_indeces:
+					line[:] = np.frombuffer(cells, np.ubyte)
+				return set(changed_indeces)
+		if self.line_solver == "permutation":
+			changed_indeces = NonogramSolver.__solve_line_permutation(numbers, line, self.stats)
+		else:
+			changed_indeces = NonogramSolver.__solve_line_settle(numbers, line, self.stats)
+		if self.line_cache is not None:
+			self.line_cache.put(key, changed_indeces, line)
+		return changed_indeces
+	
+	def __record(self, nonogram: Nonogram, column: bool, index: int, changed_indeces: set[int]):
+		"""Counts a solved line and puts its changed cells on the trail (as flat board indeces), so they can be rolled back."""
+		if self.stats is not None:
+			if column:
+				self.stats.column_solves += 1
+			else:
+				self.stats.row_solves += 1
+			self.__count_decided_cells(len(changed_indeces))
+		if self.__trail is not None and changed_indeces:
+			width = nonogram.board.shape[1]
+			self.__trail.extend(i * width + index if column else index * width + i for i in changed_indeces)
+
+	def __count_decided_cells(self, amount: int):
+		"""Counts cells that are decided for good, cells decided under an assumption aren't counted."""
+		if self.__assumptions == 0:
+			if self.stats.probing:
+				self.stats.probing_cells += amount
+			else:
+				self.stats.propagation_cells += amount
+
+	def __rollback(self, nonogram: Nonogram, checkpoint: int):
+		"""Empties every cell that was set after the checkpoint (a length of the trail)."""
+		nonogram.board.flat[self.__trail[checkpoint:]] = EMPTY
+		del self.__trail[checkpoint:]
+
+	def __solve_permutation(self, nonogram: Nonogram, time_update_callback: Callable = lambda *_: None) -> bool:
+		if self.board_engine == "bitset":
+			time_update_callback()
+			bit_nonogram = BitNonogram.from_nonogram(nonogram)
+			def count_line_solve():
+				#limits and cancellation are checked before every line solve, like with the array engine
+				self.__check_limits()
+				self.line_solves += 1
+			try:
+				solvable = bit_nonogram.propagate(count_line_solve)
+			finally:
+				#also keep the cells found before a limit stopped the propagation, the trail rolls them back if needed
+				empty = nonogram.board == EMPTY
+				bit_nonogram.write_to(nonogram)
+				if self.stats is not None:
+					self.stats.row_solves += bit_nonogram.row_solves
+					self.stats.column_solves += bit_nonogram.column_solves
+					self.__count_decided_cells(int(np.count_nonzero(empty & (nonogram.board != EMPTY))))
+				changed_cells = np.flatnonzero(empty & (nonogram.board != EMPTY)).tolist()
+				if self.__trail is not None:
+					self.__trail.extend(changed_cells)
+				for cell in changed_cells:
+					self.line_index.invalidate(divmod(cell, nonogram.board.shape[1]))
+			if not solvable:
+				return False
+			return
+		if self.schedule == "alternating":
+			return self.__propagate_alternating(nonogram, time_update_callback)
+		return self.__propagate_priority(nonogram, time_update_callback)
+
+	def __propagate_alternating(self, nonogram: Nonogram, time_update_callback: Callable = lambda *_: None) -> bool:
+		"""Solves all queued rows, then all queued columns and so on until nothing changes anymore."""
 		#add every row and column to the queue
 		row_queue    = set(range(len(nonogram.row_numbers)))
 		column_queue = set(range(len(nonogram.column_numbers)))
@@ -258,100 +844,611 @@ class NonogramSolver:
 			#try to solve every row that got updated (and is because of that in the row_queue)
 			for row in row_queue.copy():
 				row_queue.remove(row)
-				changed_indeces = NonogramSolver.__solve_line(nonogram.row_numbers[row], nonogram.board[row])
+				#complete lines can't change anymore
+				if not (nonogram.board[row] == EMPTY).any():
+					continue
+				changed_indeces = self.__solve_line(nonogram.row_numbers[row], nonogram.board[row])
+				self.__record(nonogram, False, row, changed_indeces)
 				for index in changed_indeces:
-					if not list(next(NonogramSolver.__get_permutations(nonogram.column_numbers[index], nonogram.board[:, index]), [])):
+					if not self.line_index.check(True, index, nonogram.column_numbers[index], nonogram.board[:, index], row):
 						return False
 				column_queue.update(changed_indeces)
 			#try to solve every column that got updated (and is because of that in the column_queue)
 			for column in column_queue.copy():
 				column_queue.remove(column)
+				if not (nonogram.board[:, column] == EMPTY).any():
+					continue
 				#if not NonogramSolver.__check_line_solvability(nonogram.column_numbers[column], nonogram.board[:, column]):
 				#	return False
-				changed_indeces = NonogramSolver.__solve_line(nonogram.column_numbers[column], nonogram.board[:, column])
+				changed_indeces = self.__solve_line(nonogram.column_numbers[column], nonogram.board[:, column])
+				self.__record(nonogram, True, column, changed_indeces)
 				for index in changed_indeces:
-					if not list(next(NonogramSolver.__get_permutations(nonogram.row_numbers[index], nonogram.board[index]), [])):
+					if not self.line_index.check(False, index, nonogram.row_numbers[index], nonogram.board[index], column):
 						return False
 				row_queue.update(changed_indeces)
 
-	@staticmethod
-	def __solve_disproof_cell(idx: int, nonogram: Nonogram, time_update_callback: Callable = lambda *_: None, depth: int = 1) -> bool:
-		pass
-	#terminate complete pool
-	#pool.close()
-	#pool.terminate()
-	#pool.join()
+	def __propagate_priority(self, nonogram: Nonogram, time_update_callback: Callable = lambda *_: None) -> bool:
+		"""Solves one line at a time from a single work queue, the most constrained lines first.\n
+		The priority of a line is its slack (free cells next to its minimum width) minus the amount of its cells that changed since it was queued."""
+		#the lines, their numbers and slack only depend on the numbers, which board copies share
+		if self.__schedule_lines is None or self.__schedule_lines[0] is not nonogram.row_numbers or self.__schedule_lines[1] is not nonogram.column_numbers:
+			lines = [(False, row) for row in range(len(nonogram.row_numbers))] + [(True, column) for column in range(len(nonogram.column_numbers))]
+			numbers = {(False, row): n for row, n in enumerate(nonogram.row_numbers)} | {(True, column): n for column, n in enumerate(nonogram.column_numbers)}
+			slack = {(column, index): (nonogram.board.shape[0] if column else nonogram.board.shape[1]) - NonogramSolver.__min_number_width(numbers[column, index]) for column, index in lines}
+			self.__schedule_lines = nonogram.row_numbers, nonogram.column_numbers, lines, numbers, slack
+		lines, numbers, slack = self.__schedule_lines[2:]
+		#empty cells of every line, complete lines can't change anymore and are never queued
+		empty = nonogram.board == EMPTY
+		line_unknown = dict(zip(lines, empty.sum(axis = 1).tolist() + empty.sum(axis = 0).tolist()))
+		#queued lines with their current priority, heap entries with a different priority are outdated and skipped
+		priorities = {line: slack[line] for line in lines if line_unknown[line]}
+		queue = [(priority, *line) for line, priority in priorities.items()]
+		heapq.heapify(queue)
+		unknown = int(np.count_nonzero(nonogram.board == EMPTY))
+		while queue and unknown:
+			time_update_callback()
+			priority, column, index = heapq.heappop(queue)
+			if priorities.get((column, index)) != priority:
+				continue
+			del priorities[column, index]
+			if not line_unknown[column, index]:
+				continue
+			changed_indeces = self.__solve_line(numbers[column, index], nonogram.board[:, index] if column else nonogram.board[index])
+			self.__record(nonogram, column, index, changed_indeces)
+			unknown -= len(changed_indeces)
+			line_unknown[column, index] -= len(changed_indeces)
+			for crossing in changed_indeces:
+				crossing_line = (not column, crossing)
+				if not self.line_index.check(*crossing_line, numbers[crossing_line], nonogram.board[crossing] if column else nonogram.board[:, crossing], index):
+					return False
+				line_unknown[crossing_line] -= 1
+				if not line_unknown[crossing_line]:
+					continue
+				priority = priorities.get(crossing_line, slack[crossing_line]) - 1
+				priorities[crossing_line] = priority
+				heapq.heappush(queue, (priority, *crossing_line))
+
+	def __solve_disproof_cell(self, nonogram: Nonogram, cell: tuple[int, int], target_value: int, time_update_callback: Callable = lambda *_: None, depth: int = 1, store: Union[ProbeStore, None] = None) -> tuple[int, Nonogram]:
+		"""Assumes a value for a single cell and tries to solve the nonogram with it.
+		Returns the outcome (SOLVED, CONTRADICTION or UNDECIDED) and the solved nonogram.\n
+		The "trail" search works on the board itself and rolls every change back unless the assumption solved the puzzle,
+		the "copy" search works on a copy of the board. With a store the assumption is only tried if its stored outcome isn't valid anymore."""
+		if store is not None:
+			outcome = store.get(cell[0] * nonogram.board.shape[1] + cell[1], target_value)
+			if outcome is not None:
+				if self.stats is not None:
+					self.stats.probe_hits += 1
+				return outcome, nonogram
+		self.__count_probe()
+		if self.stats is not None:
+			empty_cells = int(np.count_nonzero(nonogram.board == EMPTY))
+		if self.__assumptions == 0 and self.__trail is not None:
+			self.__trail_base = len(self.__trail)
+		self.__assumptions += 1
+		try:
+			if self.__trail is not None:
+				outcome, temp = self.__solve_disproof_cell_in_place(nonogram, cell, target_value, time_update_callback, depth, store)
+			else:
+				outcome, temp = self.__solve_disproof_cell_on_copy(nonogram, cell, target_value, time_update_callback, depth, store)
+		finally:
+			self.__assumptions -= 1
+		if self.stats is not None:
+			self.stats.probes += 1
+			self.stats.contradictions += outcome == CONTRADICTION
+			#a successful assumption keeps all of its cells
+			if outcome == SOLVED:
+				self.__count_decided_cells(empty_cells - int(np.count_nonzero(temp.board == EMPTY)))
+		return outcome, temp
+
+	def __solve_disproof_cell_on_copy(self, nonogram: Nonogram, cell: tuple[int, int], target_value: int, time_update_callback: Callable = lambda *_: None, depth: int = 1, store: Union[ProbeStore, None] = None) -> tuple[int, Nonogram]:
+		#copy nonogram board, so that the original isn't overwritten
+		temp = nonogram.copy()
+		#set assumption
+		temp.board[cell] = target_value
+		self.line_index.invalidate(cell)
+		#try to solve without further assumptions
+		self.__solve_permutation(temp, time_update_callback)
+		#if the puzzle could be solved without further assumptions, the initial assumption was correct
+		if NonogramSolver.__check_board_solved(temp):
+			return SOLVED, temp
+		implied = np.flatnonzero(temp.board != nonogram.board)
+		implied = dict(zip(implied.tolist(), temp.board.flat[implied].tolist()))
+		#otherwise if the puzzle is not solvable with the assumption, the assumption was wrong
+		if not self.__check_board_solvability(temp):
+			outcome = CONTRADICTION
+		#otherwise try to solve with further assumptions recursively
+		elif self.__solve_disproof(temp, time_update_callback, depth - 1):
+			return SOLVED, temp
+		else:
+			outcome = UNDECIDED
+		if store is not None:
+			store.put(cell[0] * nonogram.board.shape[1] + cell[1], target_value, outcome, implied)
+		return outcome, temp
 	
-	@staticmethod
-	def __solve_disproof(nonogram: Nonogram, time_update_callback: Callable = lambda *_: None, depth: int = 1) -> bool:
+	def __solve_disproof_cell_in_place(self, nonogram: Nonogram, cell: tuple[int, int], target_value: int, time_update_callback: Callable = lambda *_: None, depth: int = 1, store: Union[ProbeStore, None] = None) -> tuple[int, Nonogram]:
+		checkpoint = len(self.__trail)
+		try:
+			nonogram.board[cell] = target_value
+			self.__trail.append(cell[0] * nonogram.board.shape[1] + cell[1])
+			self.line_index.invalidate(cell)
+			self.__solve_permutation(nonogram, time_update_callback)
+			if NonogramSolver.__check_board_solved(nonogram):
+				return SOLVED, nonogram
+			implied = dict(zip(self.__trail[checkpoint:], nonogram.board.flat[self.__trail[checkpoint:]].tolist()))
+			if not self.__check_board_solvability(nonogram):
+				outcome = CONTRADICTION
+			elif self.__solve_disproof(nonogram, time_update_callback, depth - 1):
+				return SOLVED, nonogram
+			else:
+				outcome = UNDECIDED
+		except BaseException:
+			#leave the board as it was before the assumption, even if the search got interrupted
+			self.__rollback(nonogram, checkpoint)
+			raise
+		self.__rollback(nonogram, checkpoint)
+		if store is not None:
+			store.put(cell[0] * nonogram.board.shape[1] + cell[1], target_value, outcome, implied)
+		return outcome, nonogram
+
+	def __probe_cells(self, nonogram: Nonogram) -> np.ndarray:
+		"""Returns the flat indeces of the empty cells in the order the disproof method tries them, see probe_order."""
+		board = nonogram.board
+		empty = board == EMPTY
+		cells = np.flatnonzero(empty)
+		if self.probe_order == "random":
+			return self.__random.permutation(cells)
+		if self.probe_order == "row-major" or cells.size < 2:
+			return cells
+		boxes = board == BOX
+		#unknown share and share of the unknown cells that still have to be boxes of every line
+		row_unknown, column_unknown = empty.sum(axis = 1), empty.sum(axis = 0)
+		row_boxes = np.array([sum(numbers) for numbers in nonogram.row_numbers]) - boxes.sum(axis = 1)
+		column_boxes = np.array([sum(numbers) for numbers in nonogram.column_numbers]) - boxes.sum(axis = 0)
+		row_share, column_share = row_boxes / np.maximum(row_unknown, 1), column_boxes / np.maximum(column_unknown, 1)
+		#boxes among the four neighbours
+		padded = np.pad(boxes, 1)
+		neighbours = padded[:-2, 1:-1].astype(np.int8) + padded[2:, 1:-1] + padded[1:-1, :-2] + padded[1:-1, 2:]
+		score = (
+			1 - (row_unknown[:, None] / board.shape[1] + column_unknown[None, :] / board.shape[0]) / 2 #nearly solved lines
+			+ neighbours / 4
+			+ np.abs(row_share - 0.5)[:, None] + np.abs(column_share - 0.5)[None, :] #one value is much more likely than the other
+			+ NonogramSolver.PROBE_JITTER * self.__random.random(board.shape) #spreads the probes, neighbouring cells often have the same outcome
+		)
+		return cells[np.argsort(-score.flat[cells], kind = "stable")]
+
+	def __solve_disproof(self, nonogram: Nonogram, time_update_callback: Callable = lambda *_: None, depth: int = 1, store: Union[ProbeStore, None] = None) -> bool:
+		"""Tries both values of every empty cell with assumptions up to depth, a cell is forced if one of its values leads to a contradiction.
+		After a forced cell the scan starts over, the store of the level answers the assumptions that aren't affected by the new cells."""
 		if depth == 0:
 			return nonogram.is_solved()
-		for (i, j), value in np.ndenumerate(nonogram.board):
-			if value == EMPTY:
-				#print(f"depth: {depth}, indeces: {i}-{j}".ljust(40))
+		if store is None:
+			store = ProbeStore()
+		#the outermost scan remembers its tried cells for checkpoints, the first one after load_checkpoint skips the cells tried before
+		outermost = self.__assumptions == 0
+		skip = set()
+		if outermost:
+			skip, self.__resume_scan = self.__resume_scan, set()
+			self.__scan = list(skip)
+		for i, j in (divmod(flat, nonogram.board.shape[1]) for flat in self.__probe_cells(nonogram).tolist()):
+			#cells forced by an earlier restart of the scan are skipped
+			if nonogram.board[i, j] == EMPTY and i * nonogram.board.shape[1] + j not in skip:
 				contradiction = [False, False]
 				#try setting a box and a cross
 				for k, target_value in enumerate((BOX, CROSS)):
-					#copy nonogram board, so that the original isn't overwritten
-					temp = nonogram.copy()
-					#set assumption
-					temp.board[i][j] = target_value
-					#try to solve without further assumptions
-					NonogramSolver.__solve_permutation(temp, time_update_callback)
-					"""print("completed squares:", len((temp.board != EMPTY).nonzero()[0]), "     ")"""
-					#if the puzzle could be solved without further assumptions, the initial assumption was correct
-					if NonogramSolver.__check_board_solved(temp):
-						#nonogram = temp
-						nonogram.board = temp.board
-						return True
-					#otherwise if the puzzle is not solvable with the assumption, the assumption was wrong
-					if not NonogramSolver.__check_board_solvability(temp):
-						#found a contradiction
-						contradiction[k] = True
-						continue
-					#otherwise try to solve with further assumptions recursively
-					if NonogramSolver.__solve_disproof(temp, time_update_callback, depth - 1):
-						#nonogram = temp
+					outcome, temp = self.__solve_disproof_cell(nonogram, (i, j), target_value, time_update_callback, depth, store)
+					if outcome == SOLVED:
 						nonogram.board = temp.board
 						return True
+					contradiction[k] = outcome == CONTRADICTION
 				#if both assumptions were wrong, the puzzle is unsolvable at this point (in upper recursion depths it still might be solvable)
 				if contradiction[0] and contradiction[1]:
-					#print("both assumptions wrong".ljust(40))
 					return False
 				#otherwise the cell's value is forced
 				if contradiction[0] or contradiction[1]:
-					#print("forced value".ljust(40))
+					empty = nonogram.board == EMPTY
 					nonogram.board[i][j] = CROSS if contradiction[0] else BOX
-					if NonogramSolver.__solve_permutation(nonogram, time_update_callback):
+					self.line_index.invalidate((i, j))
+					if self.__trail is not None:
+						self.__trail.append(i * nonogram.board.shape[1] + j)
+					if self.stats is not None:
+						self.__count_decided_cells(1)
+					if self.__solve_permutation(nonogram, time_update_callback):
 						#after finding an assumption that works, it was solvable without further assumptions
 						return True
-					if NonogramSolver.__solve_disproof(nonogram, time_update_callback, depth):
+					store.changed(np.flatnonzero(empty & (nonogram.board != EMPTY)), nonogram.board)
+					if self.__solve_disproof(nonogram, time_update_callback, depth, store):
 						return True
-				#else: no conclusive assumption could be made for this cell
-				#print("no conclusive assumption".ljust(40))
-		#print("default false".ljust(40))
+				#otherwise no conclusive assumption could be made for this cell
+				elif outermost:
+					self.__scan.append(i * nonogram.board.shape[1] + j)
 		return False
 
-	def solve(self, print_elapsed_time = False, depth: int = 1) -> bool:
-		"""Solves the nonogram puzzle. Allows printing the elapsed time."""
+	@staticmethod
+	def __wait_for_results(results: Iterator, time_update_callback: Callable = lambda *_: None, interval: float = 0.1) -> Iterator:
+		"""Yields the results of a pool iterator and calls the callback at least every interval seconds while waiting, so limits are checked in time."""
+		while True:
+			try:
+				yield results.next(interval)
+			except StopIteration:
+				return
+			except PoolTimeoutError:
+				time_update_callback()
+
+	def __solve_disproof_parallel(self, nonogram: Nonogram, pool: Pool, shared: tuple, time_update_callback: Callable = lambda *_: None, depth: int = 1) -> bool:
+		"""Same as __solve_disproof, but the assumptions of all empty cells are tried in the worker processes of the pool.\n
+		shared holds the generation counter, the board and its store version in shared memory. Workers always start from the newest board
+		and skip cells that got decided in the meantime. Every contradiction of a round is merged into the board as it arrives,
+		the next round only tries the assumptions whose stored outcome isn't valid anymore. Increasing the generation cancels all outstanding assumptions."""
+		generation, shared_board, shared_version = shared
+		store = ProbeStore()
+		def publish():
+			with shared_board.get_lock():
+				np.frombuffer(shared_board.get_obj(), np.ubyte)[:] = nonogram.board.ravel()
+				shared_version.value = store.version
+		def cancel_outstanding():
+			with generation.get_lock():
+				generation.value += 1
+		while True:
+			publish()
+			tasks = []
+			for flat in self.__probe_cells(nonogram).tolist():
+				for target_value in (BOX, CROSS):
+					if store.get(flat, target_value) is None:
+						tasks.append((generation.value, divmod(flat, nonogram.board.shape[1]), target_value, depth))
+					elif self.stats is not None:
+						self.stats.probe_hits += 1
+			if not tasks:
+				return NonogramSolver.__check_board_solved(nonogram)
+			forced = False
+			for _, cell, target_value, outcome, version, result in NonogramSolver.__wait_for_results(pool.imap_unordered(_solve_disproof_worker, tasks), time_update_callback):
+				#the cell was already decided when the worker got to it
+				if outcome is None:
+					continue
+				self.__count_probe()
+				time_update_callback()
+				if self.stats is not None:
+					self.stats.probes += 1
+					self.stats.contradictions += outcome == CONTRADICTION
+				if outcome == SOLVED:
+					cancel_outstanding()
+					if self.stats is not None:
+						self.__count_decided_cells(int(np.count_nonzero(nonogram.board == EMPTY)))
+					nonogram.board = np.frombuffer(result, np.ubyte).reshape(nonogram.board.shape).copy()
+					self.line_index.clear()
+					return True
+				store.put(cell[0] * nonogram.board.shape[1] + cell[1], target_value, outcome, result, version)
+				if outcome == CONTRADICTION:
+					#the board only gained cells since the worker's copy, so the contradiction still holds
+					if nonogram.board[cell] == target_value:
+						cancel_outstanding()
+						return False
+					if nonogram.board[cell] != EMPTY:
+						continue
+					#the cell's value is forced, merge it into the board and hand the new board to the workers
+					empty = nonogram.board == EMPTY
+					nonogram.board[cell] = CROSS if target_value == BOX else BOX
+					self.line_index.invalidate(cell)
+					if self.__trail is not None:
+						self.__trail.append(cell[0] * nonogram.board.shape[1] + cell[1])
+					if self.stats is not None:
+						self.__count_decided_cells(1)
+					self.__solve_permutation(nonogram, time_update_callback)
+					store.changed(np.flatnonzero(empty & (nonogram.board != EMPTY)), nonogram.board)
+					if NonogramSolver.__check_board_solved(nonogram) or not self.__check_board_solvability(nonogram):
+						cancel_outstanding()
+						return bool(NonogramSolver.__check_board_solved(nonogram))
+					publish()
+					forced = True
+			#no conclusive assumption could be made for any cell
+			if not forced:
+				return False
+
+	def __solve_sat(self, nonogram: Nonogram, time_update_callback: Callable = lambda *_: None) -> bool:
+		"""Encodes the remaining puzzle as CNF and solves it completely with a SAT solver (see sat_solver.py). Returns False if it has no solution."""
+		cnf = NonogramCNF(nonogram, time_update_callback)
+		model = solve_cnf(cnf, callback = time_update_callback)
+		if model is None:
+			return False
+		changed_cells = np.flatnonzero(nonogram.board == EMPTY).tolist()
+		nonogram.board.flat[changed_cells] = cnf.decode(model).flat[changed_cells]
+		if self.__trail is not None:
+			self.__trail.extend(changed_cells)
+		if self.stats is not None:
+			self.__count_decided_cells(len(changed_cells))
+		return True
+
+	def solve(self, print_elapsed_time = False, depth: int = 1, jobs: int = 1, stats: bool = False, engine: str = "probing", time_limit: float = 0, max_line_solves: int = 0, max_probes: int = 0,
+	          progress: Union[Callable[[dict], None], None] = None, cancel: Union[threading.Event, None] = None, store: Union[ResultStore, None] = None,
+	          checkpoint: Union[str, os.PathLike, None] = None, checkpoint_interval: float = CHECKPOINT_INTERVAL) -> bool:
+		"""Solves the nonogram puzzle. Allows printing the elapsed time.\n
+		After the propagation the engine either tries assumptions up to the given depth ("probing", default)
+		or solves the rest completely with a SAT solver ("sat", depth and jobs are ignored).
+		With more than one job the assumptions of the disproof method are tried in that many worker processes.
+		With stats the counters of this call are collected in self.stats (a SolverStats object), otherwise it is None.\n
+		The search stops early after time_limit seconds, max_line_solves line solves or max_probes assumptions (0 == no limit).
+		Then self.stopped_by names the limit and the board keeps every cell decided so far, see decided_share.
+		Setting the cancel event from another thread stops the search the same way, with stopped_by == "cancelled".
+		With a store a known solution is taken from it without solving (from_store is set), new solutions are written to it with the needed depth if it is known (None otherwise).
+		With checkpoint the state is written to that file every checkpoint_interval seconds and when the call ends unsolved (also when it's interrupted),
+		a solved puzzle removes the file. load_checkpoint continues from it.\n
+		progress is called with one dict per event, the key "event" is one of:
+		- "phase": a phase ("prepass", "propagation", "disproof" or "sat") starts
+		- "progress": at most every PROGRESS_INTERVAL seconds with the elapsed time, line solves, probes and the decided share of the board
+		- "done": the call returns, with solved and stopped_by\n
+		Returns True only if the board agrees with every number. If a line can't agree with its numbers anymore, unsolvable is set."""
+		if engine not in NonogramSolver.ENGINES:
+			raise ValueError(f"Unknown engine '{engine}', choose from {', '.join(NonogramSolver.ENGINES)}.")
 		self.__start_time = time.perf_counter_ns()
-		function_ = self.__update_elapsed_time if print_elapsed_time else lambda *_: None
-		self.__solve_permutation(self.nonogram, function_)
+		self.line_solves = self.probes = 0
+		self.stopped_by = None
+		self.unsolvable = False
+		self.__deadline = time.perf_counter() + time_limit if time_limit > 0 else None
+		self.__max_line_solves, self.__max_probes = max_line_solves, max_probes
+		self.__cancel = cancel
+		self.stats = SolverStats() if stats else None
+		self.__assumptions = 0
+		self.__scan = []
+		if self.__trail is not None:
+			self.__trail.clear()
+		update_elapsed_time = self.__update_elapsed_time if print_elapsed_time else lambda *_: None
+		report = progress if progress is not None else lambda *_: None
+		start_time = next_progress = time.perf_counter()
+		next_checkpoint = start_time + checkpoint_interval
+		self.from_store = False
+		if store is not None:
+			entry = store.get(self.nonogram)
+			if entry is not None:
+				self.nonogram.board[...] = entry["board"]
+				self.from_store = True
+				self.__cancel = None
+				if print_elapsed_time:
+					self.__update_elapsed_time(True)
+				report({"event": "done", "solved": True, "stopped_by": None})
+				return True
+		nonogram, region = self.nonogram, None #the board the search works on, see the reduction below
+		def function_(*_):
+			nonlocal next_progress, next_checkpoint
+			update_elapsed_time()
+			now = time.perf_counter()
+			if progress is not None and now >= next_progress:
+				next_progress = now + NonogramSolver.PROGRESS_INTERVAL
+				report({"event": "progress", "phase": phase, "time": now - start_time, "line_solves": self.line_solves, "probes": self.probes, "decided": self.decided_share})
+			if checkpoint is not None and now >= next_checkpoint:
+				next_checkpoint = now + checkpoint_interval
+				self.__checkpoint(checkpoint, nonogram, region, depth, phase)
+			self.__check_limits()
+		#the placements of an earlier call don't have to agree with the board anymore
+		self.line_index.clear()
+		if self.prepass:
+			phase = "prepass"
+			report({"event": "phase", "phase": phase})
+			phase_start = time.perf_counter()
+			self.__solve_simple_rules(self.nonogram)
+			self.line_index.clear()
+			if self.stats is not None:
+				self.stats.add_time("prepass", time.perf_counter() - phase_start)
+		phase = "propagation"
+		report({"event": "phase", "phase": phase})
+		phase_start = time.perf_counter()
+		depth = min(depth, NonogramSolver.MAX_DEPTH)
+		#only the depth of propagation and of single assumptions is known for sure, deeper searches may have needed less, callers that
+		#try growing depths (like batch_solver.solve_nonogram) know the lowest one
+		needed_depth = 1 if engine != "sat" and depth == 1 else None
+		if depth != self.__resume_depth:
+			self.__resume_scan = set()
 		try:
-			self.__solve_disproof(self.nonogram, function_, min(depth, NonogramSolver.MAX_DEPTH))
+			self.__check_limits()
+			self.__solve_permutation(self.nonogram, function_)
+			if self.nonogram.is_solved():
+				needed_depth = 0
+			if self.stats is not None:
+				self.stats.add_time(phase, time.perf_counter() - phase_start)
+				self.stats.probing = True
+			phase = "sat" if engine == "sat" else "disproof"
+			report({"event": "phase", "phase": phase})
+			phase_start = time.perf_counter()
+			core = NonogramSolver.__reduce_board(self.nonogram) if self.reduce and not self.nonogram.is_solved() else None
+			nonogram, region = core if core is not None else (self.nonogram, None)
+			self.__search = nonogram, region
+			if region is not None:
+				#line indeces and trail entries of the core don't match the board
+				self.line_index.clear()
+				if self.__trail is not None:
+					self.__trail.clear()
+				#the cells of a checkpoint are flat indeces of the whole board
+				rows, columns = region
+				self.__resume_scan = {(i - rows.start) * nonogram.board.shape[1] + j - columns.start for i, j in (divmod(flat, self.nonogram.board.shape[1]) for flat in self.__resume_scan)
+				                      if rows.start <= i < rows.stop and columns.start <= j < columns.stop}
+			try:
+				if engine == "sat":
+					if not nonogram.is_solved():
+						self.__solve_sat(nonogram, function_)
+				elif jobs > 1 and depth > 0 and not nonogram.is_solved():
+					shared = Value("i", 0), Array("B", nonogram.board.size), Value("i", 0)
+					options = {"line_solver": self.line_solver, "board_engine": self.board_engine, "cache_size": self.line_cache.size if self.line_cache is not None else 0, "schedule": self.schedule, "search": self.search, "prepass": self.prepass, "reduce": self.reduce, "probe_order": self.probe_order, "seed": self.seed}
+					with Pool(jobs, _init_disproof_worker, (nonogram.row_numbers, nonogram.column_numbers, options, shared)) as pool:
+						self.__solve_disproof_parallel(nonogram, pool, shared, function_, depth)
+				else:
+					self.__solve_disproof(nonogram, function_, depth)
+			finally:
+				#map the core back, also if a limit stopped the search
+				if region is not None:
+					self.nonogram.board[region] = nonogram.board
+					self.line_index.clear()
+					if self.__trail is not None:
+						self.__trail.clear()
+		except _LimitReached as limit:
+			#failed assumptions are already rolled back, only cells that are decided for good are left
+			self.stopped_by = limit.args[0]
 		except RecursionError:
 			print()
 			print("Maximum recursion depth reached."*5)
+			report({"event": "done", "solved": False, "stopped_by": None})
 			return False
+		finally:
+			self.__cancel = None
+			self.__search = None
+			self.__resume_scan = set()
+			if self.stats is not None:
+				self.stats.add_time(phase, time.perf_counter() - phase_start)
+			if checkpoint is not None:
+				if self.nonogram.is_solved():
+					with contextlib.suppress(FileNotFoundError):
+						os.remove(checkpoint)
+				else:
+					self.__checkpoint(checkpoint, nonogram, region, depth, phase)
 		if print_elapsed_time:
 			self.__update_elapsed_time(True)
-		return self.nonogram.is_solved()
+		#a board without empty cells may still break the numbers, e.g. if they contradict each other
+		solved = bool(NonogramSolver.__check_board_solved(self.nonogram))
+		if not solved:
+			self.line_index.clear()
+			self.unsolvable = not self.__check_board_solvability(self.nonogram)
+		if solved and store is not None:
+			result_stats = self.stats.to_dict() if self.stats is not None else {"line_solves": self.line_solves, "probes": self.probes}
+			result_stats["time"] = round(time.perf_counter() - start_time, 6)
+			store.put(self.nonogram, self.nonogram.board, needed_depth, result_stats)
+		report({"event": "done", "solved": solved, "stopped_by": self.stopped_by})
+		return solved
+
+	def __count_solutions(self, nonogram: Nonogram, limit: int, solutions: list[np.ndarray], time_update_callback: Callable = lambda *_: None):
+		"""Solves the lines and branches on the first empty cell until limit solutions are found. Every branch is rolled back (or works on a copy with the "copy" search)."""
+		self.__check_limits()
+		if self.__solve_permutation(nonogram, time_update_callback) is False or not self.__check_board_solvability(nonogram):
+			return
+		empty = np.flatnonzero(nonogram.board == EMPTY)
+		if empty.size == 0:
+			if NonogramSolver.__check_board_solved(nonogram):
+				solutions.append(nonogram.board.copy())
+			return
+		cell = divmod(int(empty[0]), nonogram.board.shape[1])
+		self.__assumptions += 1
+		try:
+			for target_value in (BOX, CROSS):
+				if self.__trail is not None:
+					checkpoint = len(self.__trail)
+					nonogram.board[cell] = target_value
+					self.__trail.append(int(empty[0]))
+					self.line_index.invalidate(cell)
+					try:
+						self.__count_solutions(nonogram, limit, solutions, time_update_callback)
+					finally:
+						self.__rollback(nonogram, checkpoint)
+				else:
+					temp = nonogram.copy()
+					temp.board[cell] = target_value
+					self.line_index.invalidate(cell)
+					self.__count_solutions(temp, limit, solutions, time_update_callback)
+				if len(solutions) >= limit:
+					return
+		finally:
+			self.__assumptions -= 1
+
+	def count_solutions(self, limit: int = 2, print_elapsed_time = False, time_limit: float = 0) -> tuple[int, list[np.ndarray]]:
+		"""Counts the solutions of the nonogram puzzle, but stops as soon as limit solutions are found, so the default answers if the puzzle is unique.
+		Returns the count (at most limit) and the boards of the solutions that were found. The board of the nonogram isn't changed.\n
+		Unlike the disproof method every branch is followed to the end, so a puzzle that is solved by an assumption still gets checked for another solution.
+		After time_limit seconds (0 == no limit) the search stops with stopped_by == "time", then the count only says how many solutions were found so far."""
+		self.__start_time = time.perf_counter_ns()
+		self.line_solves = self.probes = 0
+		self.stopped_by = None
+		self.__deadline = time.perf_counter() + time_limit if time_limit > 0 else None
+		self.__max_line_solves = self.__max_probes = 0
+		self.stats = None
+		self.__assumptions = 0
+		if self.__trail is not None:
+			self.__trail.clear()
+		self.line_index.clear()
+		function_ = self.__update_elapsed_time if print_elapsed_time else lambda *_: None
+		nonogram = self.nonogram.copy()
+		if self.prepass:
+			self.__solve_simple_rules(nonogram)
+			self.line_index.clear()
+		solutions = []
+		try:
+			self.__count_solutions(nonogram, max(limit, 1), solutions, function_)
+		except _LimitReached as limit_reached:
+			self.stopped_by = limit_reached.args[0]
+		finally:
+			self.__deadline = None
+		if print_elapsed_time:
+			self.__update_elapsed_time(True)
+		return len(solutions), solutions
 	
+	@property
+	def decided_share(self) -> float:
+		"""Share of the cells that are decided for good, from 0 to 1. During a search the cells of running assumptions don't count."""
+		board = self.__decided_board(*self.__search) if self.__search is not None else self.nonogram.board
+		return float(np.count_nonzero(board != EMPTY)) / max(board.size, 1)
+
 	def __str__(self) -> str:
 		return str(self.nonogram)
 	
 
 
+	# --------------------------------------------------- CHECKPOINTS ---------------------------------------------------- #
+	def __decided_board(self, nonogram: Nonogram, region: Union[tuple[slice, slice], None]) -> np.ndarray:
+		"""Returns a copy of the whole board with the cells that are decided for good, nonogram and region as for __checkpoint."""
+		board = nonogram.board.copy()
+		#cells of the running assumptions aren't decided for good, with the copy search they aren't on this board anyway
+		if self.__trail is not None and self.__assumptions > 0:
+			board.flat[self.__trail[self.__trail_base:]] = EMPTY
+		if region is not None:
+			full_board = self.nonogram.board.copy()
+			full_board[region] = board
+			board = full_board
+		return board
+
+	def __checkpoint(self, file: Union[str, os.PathLike], nonogram: Nonogram, region: Union[tuple[slice, slice], None], depth: int, phase: str):
+		"""Writes the cells that are decided for good, the depth and the tried cells of the outermost disproof scan to file.
+		nonogram is the board the search works on, region its place on the whole board if it is the reduced core."""
+		board = self.__decided_board(nonogram, region)
+		scan = self.__scan
+		if region is not None:
+			rows, columns = region
+			scan = [(i + rows.start) * board.shape[1] + j + columns.start for i, j in (divmod(flat, nonogram.board.shape[1]) for flat in scan)]
+		state = {
+			"version": NonogramSolver.CHECKPOINT_VERSION,
+			"rows": [[int(number) for number in numbers] for numbers in self.nonogram.row_numbers],
+			"columns": [[int(number) for number in numbers] for numbers in self.nonogram.column_numbers],
+			"depth": depth,
+			"phase": phase,
+			"board": ["".join(str(cell) for cell in row) for row in board.tolist()],
+			"scan": scan if phase == "disproof" else [],
+			"line_solves": self.line_solves,
+			"probes": self.probes,
+			#the random generator of the probe order continues where it stopped
+			"probe_order": self.probe_order,
+			"random": self.__random.bit_generator.state,
+		}
+		#an interrupted write must not destroy the last checkpoint
+		with open(f"{file}.tmp", "w") as f:
+			json.dump(state, f)
+		os.replace(f"{file}.tmp", file)
+
+	def load_checkpoint(self, file: Union[str, os.PathLike]) -> int:
+		"""Continues from a checkpoint written by solve: its decided cells are put on the board and the next solve call
+		skips the cells the outermost disproof scan already tried. With the same probe order its random generator continues from the checkpoint as well.
+		Returns the depth of the checkpoint, which should be passed to solve.\n
+		Raises ValueError if the checkpoint belongs to another puzzle or disagrees with the board."""
+		with open(file, "r") as f:
+			state = json.load(f)
+		if state.get("version") != NonogramSolver.CHECKPOINT_VERSION:
+			raise ValueError(f"Unsupported checkpoint version {state.get('version')}.")
+		if state["rows"] != [[int(number) for number in numbers] for numbers in self.nonogram.row_numbers] or state["columns"] != [[int(number) for number in numbers] for numbers in self.nonogram.column_numbers]:
+			raise ValueError("The checkpoint belongs to another puzzle.")
+		board = np.array([[int(cell) for cell in row] for row in state["board"]], np.ubyte).reshape(self.nonogram.board.shape)
+		if np.any((self.nonogram.board != EMPTY) & (board != EMPTY) & (self.nonogram.board != board)):
+			raise ValueError("The checkpoint disagrees with the board.")
+		self.nonogram.board[board != EMPTY] = board[board != EMPTY]
+		self.__resume_scan = set(state["scan"])
+		self.__resume_depth = int(state["depth"])
+		if state.get("probe_order") == self.probe_order and "random" in state:
+			self.__random.bit_generator.state = state["random"]
+		return self.__resume_depth
+
+
+
 	# ------------------------------------------------------ OUTPUT ------------------------------------------------------ #
 	def __print_time(self, time: float, newline = True) -> str:
 		print(f"Time elapsed: {(time - self.__start_time) / 1e9:11.6f} seconds", end = "\r\n" if newline else "\r")
@@ -375,6 +1472,51 @@ class NonogramSolver:
 
 
 
+# -------------------------------------------------------------------------------------------------------------------- #
+#                                                   DISPROOF WORKERS                                                   #
+# -------------------------------------------------------------------------------------------------------------------- #
+
+class _DisproofCancelled(Exception):
+	pass
+
+def _init_disproof_worker(row_numbers: list[list[int]], column_numbers: list[list[int]], options: dict, shared: tuple):
+	"""Creates the solver of a worker process once, so its line cache stays warm between assumptions."""
+	global _disproof_worker_state
+	nonogram = Nonogram(None, (len(row_numbers), len(column_numbers)))
+	nonogram.row_numbers = row_numbers
+	nonogram.column_numbers = column_numbers
+	_disproof_worker_state = NonogramSolver(nonogram, **options), shared
+
+def _solve_disproof_worker(task: tuple) -> tuple:
+	"""Tries a single assumption on the newest board of the main process. Stops early if the main process cancelled the generation.
+	Returns the outcome (None if the cell is already decided), the store version of the board
+	and the solved board or the cells the propagation decided."""
+	task_generation, cell, target_value, depth = task
+	solver, (generation, shared_board, shared_version) = _disproof_worker_state
+	def check_cancelled(*_):
+		if generation.value != task_generation:
+			raise _DisproofCancelled
+	try:
+		check_cancelled()
+		with shared_board.get_lock():
+			board = np.frombuffer(shared_board.get_obj(), np.ubyte).reshape(solver.nonogram.board.shape).copy()
+			version = shared_version.value
+		#assumptions leave the worker's board as it was, so only the lines of cells the main process decided since lose their placements
+		for changed_cell in np.argwhere(board != solver.nonogram.board).tolist():
+			solver.line_index.invalidate(changed_cell)
+		solver.nonogram.board = board
+		if board[cell] != EMPTY:
+			return task_generation, cell, target_value, None, version, None
+		store = ProbeStore()
+		outcome, temp = solver._NonogramSolver__solve_disproof_cell(solver.nonogram, cell, target_value, check_cancelled, depth, store)
+	except _DisproofCancelled:
+		return task_generation, cell, target_value, None, 0, None
+	if outcome == SOLVED:
+		return task_generation, cell, target_value, outcome, version, temp.board.tobytes()
+	return task_generation, cell, target_value, outcome, version, store.implied(cell[0] * solver.nonogram.board.shape[1] + cell[1], target_value)
+
+
+
 # -------------------------------------------------------------------------------------------------------------------- #
 #                                                         MAIN                                                         #
 # -------------------------------------------------------------------------------------------------------------------- #
@@ -384,25 +1526,99 @@ if __name__ == "__main__":
 	parser.add_argument("dataset", help = "CSV file")
 	parser.add_argument("-t", "--time",  dest = "time", action = "store_true", help = "prints the elapsed time")
 	parser.add_argument("-d", "--depth", dest = "depth", type = int, choices = range(NonogramSolver.MAX_DEPTH + 1), default = 1, help = "assumption depth")
+	parser.add_argument("-l", "--line-solver", dest = "line_solver", choices = NonogramSolver.LINE_SOLVERS, default = "settle", help = "line solving method (permutation is the slow reference)")
+	parser.add_argument("-b", "--board", dest = "board_engine", choices = NonogramSolver.BOARD_ENGINES, default = "array", help = "board representation used for propagation, bitset starts every propagation with all lines and ignores --schedule, the line cache and the placement statistics")
+	parser.add_argument("-s", "--schedule", dest = "schedule", choices = NonogramSolver.SCHEDULES, default = "priority", help = "order in which rows and columns are solved")
+	parser.add_argument("--search", dest = "search", choices = NonogramSolver.SEARCHES, default = "trail", help = "how assumptions are undone: rolling back the changed cells or working on board copies")
+	parser.add_argument("--no-prepass", dest = "prepass", action = "store_false", help = "skips the vectorized simple rules before the first line solve")
+	parser.add_argument("--no-reduce", dest = "reduce", action = "store_false", help = "lets the assumptions see the whole board instead of only its unsolved core")
+	parser.add_argument("--probe-order", dest = "probe_order", choices = NonogramSolver.PROBE_ORDERS, default = "row-major", help = "order in which the disproof method tries the empty cells")
+	parser.add_argument("--seed", dest = "seed", type = int, default = 0, help = "seed of the random and heuristic probe orders")
+	parser.add_argument("-c", "--cache", dest = "cache_size", type = int, default = LineCache.DEFAULT_SIZE, metavar = "SIZE", help = f"amount of solved lines to remember, 0 turns the cache off (default: {LineCache.DEFAULT_SIZE})")
+	parser.add_argument("-e", "--engine", dest = "engine", choices = NonogramSolver.ENGINES, default = "probing", help = "how the puzzle is finished after the propagation: assumptions up to the depth or a complete SAT solver")
+	parser.add_argument("--dimacs", dest = "dimacs", metavar = "FILE", help = "writes the remaining puzzle as CNF in the DIMACS format to FILE (use -d 0 for the state after the propagation)")
+	parser.add_argument("-u", "--count", dest = "count", type = int, nargs = "?", const = 2, metavar = "LIMIT", help = "counts the solutions up to LIMIT (default: 2, enough to tell if the puzzle is unique) instead of solving, exits with 0 only for a unique puzzle")
+	parser.add_argument("-j", "--jobs", dest = "jobs", type = int, default = 1, help = "amount of worker processes that try assumptions in parallel")
+	parser.add_argument("--time-limit", dest = "time_limit", type = float, default = 0, metavar = "SECONDS", help = "stops the solver after this time and keeps the cells decided so far, 0 means no limit")
+	parser.add_argument("--max-line-solves", dest = "max_line_solves", type = int, default = 0, metavar = "N", help = "stops the solver after N line solves, 0 means no limit")
+	parser.add_argument("--max-probes", dest = "max_probes", type = int, default = 0, metavar = "N", help = "stops the solver after N probed assumptions, 0 means no limit")
+	parser.add_argument("--stats", dest = "stats", action = "store_true", help = "prints the solver statistics")
+	parser.add_argument("--stats-json", dest = "stats_json", metavar = "FILE", help = "writes the solver statistics as JSON to FILE ('-' for stdout)")
+	parser.add_argument("--store", dest = "store", metavar = "FILE", help = "looks the puzzle up in this SQLite result store before solving and adds new solutions to it")
+	parser.add_argument("--store-size", dest = "store_size", type = int, default = ResultStore.DEFAULT_SIZE, metavar = "N", help = f"amount of solutions the result store keeps, the least recently used ones are evicted (default: {ResultStore.DEFAULT_SIZE})")
+	parser.add_argument("--checkpoint", dest = "checkpoint", metavar = "FILE", help = "saves the progress to FILE regularly and when the solver stops unsolved (also on Ctrl+C)")
+	parser.add_argument("--checkpoint-interval", dest = "checkpoint_interval", type = float, default = NonogramSolver.CHECKPOINT_INTERVAL, metavar = "SECONDS", help = f"seconds between two checkpoints (default: {NonogramSolver.CHECKPOINT_INTERVAL:g})")
+	parser.add_argument("--resume", dest = "resume", action = "store_true", help = "continues from the --checkpoint file with its board, depth and disproof position, if it exists")
 	parser.add_argument("-p", "--profiler", dest = "profiler", action = "store_true", help = "writes performance profile to profile.txt")
 	args = parser.parse_args()
+	if args.resume and args.checkpoint is None:
+		parser.error("--resume needs --checkpoint FILE")
+
+	if args.count is not None:
+		nonogram = NonogramSolver(args.dataset, args.line_solver, args.board_engine, args.cache_size, args.schedule, args.search, args.prepass, args.reduce, args.probe_order, args.seed)
+		count, boards = nonogram.count_solutions(args.count, args.time, args.time_limit)
+		if nonogram.stopped_by is not None:
+			print(f"Stopped by the {nonogram.stopped_by.replace('_', ' ')} limit after {count} solutions" + (":" if count else "."))
+		elif count == 0:
+			print("The nonogram has no solution.")
+		elif count == 1:
+			print("The nonogram has a unique solution:")
+		else:
+			print(f"The nonogram has at least {count} solutions:")
+		for board in boards:
+			nonogram.nonogram.board = board
+			print(nonogram)
+		exit(0 if count == 1 and nonogram.stopped_by is None else 1)
 
 	solved = False
+	collect_stats = args.stats or args.stats_json is not None
+	store = ResultStore(args.store, args.store_size) if args.store is not None else None
 	try:
-		nonogram = NonogramSolver(args.dataset)
+		nonogram = NonogramSolver(args.dataset, args.line_solver, args.board_engine, args.cache_size, args.schedule, args.search, args.prepass, args.reduce, args.probe_order, args.seed)
+		if args.resume and os.path.exists(args.checkpoint):
+			args.depth = nonogram.load_checkpoint(args.checkpoint)
+			print(f"Resuming from {args.checkpoint} with depth {args.depth}, {nonogram.decided_share:.1%} of the cells decided.")
 		if args.profiler:
-			profile.run("solved = nonogram.solve(args.time, args.depth)", "profile.temp")
+			profile.run("solved = nonogram.solve(args.time, args.depth, args.jobs, collect_stats, args.engine, args.time_limit, args.max_line_solves, args.max_probes, store = store, checkpoint = args.checkpoint, checkpoint_interval = args.checkpoint_interval)", "profile.temp")
 		else:
-			solved = nonogram.solve(args.time, args.depth)
+			solved = nonogram.solve(args.time, args.depth, args.jobs, collect_stats, args.engine, args.time_limit, args.max_line_solves, args.max_probes,
+			                        store = store, checkpoint = args.checkpoint, checkpoint_interval = args.checkpoint_interval)
 	except KeyboardInterrupt:
 		print() #newline, otherwise elapsed time is overwritten
 		solved = False
+	finally:
+		if store is not None:
+			store.close()
 
-	if solved:
+	if nonogram.from_store:
+		print("Solved nonogram (from the result store):")
+	elif solved:
 		print("Solved nonogram:")
 	else:
 		print("Unfinished nonogram:")
 	print(nonogram)
+	if nonogram.unsolvable:
+		print("The nonogram has no solution, its numbers contradict each other.")
+	if nonogram.stopped_by is not None:
+		print(f"Stopped by the {nonogram.stopped_by.replace('_', ' ')} limit, {nonogram.decided_share:.1%} of the cells decided.")
+	if args.checkpoint is not None and not solved and os.path.exists(args.checkpoint):
+		print(f"Progress saved to {args.checkpoint}, continue with --resume.")
+	if args.time:
+		print("Line solves:", nonogram.line_solves)
+		if nonogram.line_cache is not None:
+			print(nonogram.line_cache)
+		print(nonogram.line_index)
+	if args.dimacs is not None:
+		with open(args.dimacs, "w") as f:
+			f.write(NonogramCNF(nonogram.nonogram).to_dimacs())
+	if args.stats and nonogram.stats is not None:
+		print(nonogram.stats, end = "")
+	if args.stats_json is not None and nonogram.stats is not None:
+		if args.stats_json == "-":
+			print(nonogram.stats.to_json())
+		else:
+			with open(args.stats_json, "w") as f:
+				f.write(nonogram.stats.to_json())
 
 	if args.profiler:
 		with open("profile.txt", "w") as f:
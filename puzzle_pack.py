@@ -0,0 +1,192 @@
+"""
+	Binary container for many nonogram puzzles: the numbers (and optionally the solution) of every puzzle are stored as one record,
+	an index of record offsets at the end of the file makes every puzzle reachable without reading the others.
+	The loader maps the file into memory and creates Nonogram objects only when they are accessed.
+"""
+
+__all__ = ["PuzzlePack", "write_pack", "convert_csv"]
+
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+#                                                        IMPORTS                                                       #
+# -------------------------------------------------------------------------------------------------------------------- #
+
+import os, io, sys, mmap, struct, argparse, contextlib
+from typing import Union
+from collections.abc import Iterable, Iterator
+
+import numpy as np
+
+from nonogram import Nonogram, EMPTY, CROSS, BOX
+from nonogram_solver import NonogramSolver
+
+#file layout (little endian):
+#	header:  magic, version, amount of puzzles, offset of the index
+#	records: height, width, flags, then one uint16 amount per row and column followed by the numbers of every line,
+#	         then the solution as one bit per cell (row-major, 1 == box) if the flag is set
+#	index:   amount + 1 uint64 offsets, the last one is the end of the last record
+MAGIC = b"NONOPACK"
+VERSION = 1
+HEADER = struct.Struct("<8sIIQ")
+RECORD_HEADER = struct.Struct("<HHB")
+HAS_SOLUTION = 1
+
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+#                                                        WRITING                                                       #
+# -------------------------------------------------------------------------------------------------------------------- #
+
+def _encode_record(row_numbers: list[list[int]], column_numbers: list[list[int]], solution: Union[np.ndarray, None] = None) -> bytes:
+	lines = list(row_numbers) + list(column_numbers)
+	numbers = [len(line) for line in lines] + [number for line in lines for number in line]
+	record = RECORD_HEADER.pack(len(row_numbers), len(column_numbers), HAS_SOLUTION if solution is not None else 0)
+	record += np.array(numbers, "<u2").tobytes()
+	if solution is not None:
+		record += np.packbits(np.asarray(solution) == BOX).tobytes()
+	return record
+
+def write_pack(file: Union[str, bytes, os.PathLike], puzzles: Iterable[Union[Nonogram, tuple]]) -> int:
+	"""Writes puzzles into a pack file and returns their amount.\n
+	A puzzle is either a Nonogram (a completely filled board is stored as its solution) or a tuple (row_numbers, column_numbers[, solution]).
+	The puzzles are written one after another, so an iterator doesn't have to fit into memory."""
+	offsets = []
+	with open(file, "wb") as f:
+		f.write(HEADER.pack(MAGIC, VERSION, 0, 0))
+		for puzzle in puzzles:
+			if isinstance(puzzle, Nonogram):
+				solution = puzzle.board if puzzle.is_solved() else None
+				puzzle = (puzzle.row_numbers, puzzle.column_numbers, solution)
+			offsets.append(f.tell())
+			f.write(_encode_record(*puzzle))
+		offsets.append(f.tell())
+		index_offset = f.tell()
+		f.write(np.array(offsets, "<u8").tobytes())
+		f.seek(0)
+		f.write(HEADER.pack(MAGIC, VERSION, len(offsets) - 1, index_offset))
+	return len(offsets) - 1
+
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+#                                                        LOADING                                                       #
+# -------------------------------------------------------------------------------------------------------------------- #
+
+class PuzzlePack:
+	"""Read-only view of a pack file. Puzzles are decoded on access by index (negative indeces and slices work as for lists) or by iteration.
+
+	Attributes:
+		file: Path of the pack file.
+	"""
+	def __init__(self, file: Union[str, bytes, os.PathLike]):
+		self.file = file
+		with open(file, "rb") as f:
+			self.__map = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)
+		magic, version, count, index_offset = HEADER.unpack_from(self.__map)
+		if magic != MAGIC:
+			self.__map.close()
+			raise ValueError(f"'{file}' is no puzzle pack.")
+		if version != VERSION:
+			self.__map.close()
+			raise ValueError(f"Unsupported puzzle pack version {version}.")
+		self.__offsets = np.frombuffer(self.__map, "<u8", count + 1, index_offset)
+
+	def __len__(self) -> int:
+		return len(self.__offsets) - 1
+
+	def __repr__(self) -> str:
+		return "PuzzlePack ({}, {} puzzles)".format(self.file, len(self))
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *_):
+		self.close()
+
+	def close(self):
+		#the index is a view into the map, it has to be released first
+		self.__offsets = np.zeros(1, "<u8")
+		self.__map.close()
+
+	def __record(self, index: int) -> tuple[list[list[int]], list[list[int]], Union[np.ndarray, None]]:
+		if index < 0:
+			index += len(self)
+		if not 0 <= index < len(self):
+			raise IndexError("puzzle index out of range")
+		offset = int(self.__offsets[index])
+		height, width, flags = RECORD_HEADER.unpack_from(self.__map, offset)
+		offset += RECORD_HEADER.size
+		amounts = np.frombuffer(self.__map, "<u2", height + width, offset)
+		offset += amounts.nbytes
+		numbers = np.frombuffer(self.__map, "<u2", int(amounts.sum()), offset).tolist()
+		offset += 2 * len(numbers)
+		lines, start = [], 0
+		for amount in amounts.tolist():
+			lines.append(numbers[start:start + amount])
+			start += amount
+		solution = None
+		if flags & HAS_SOLUTION:
+			bits = np.frombuffer(self.__map, np.ubyte, (height * width + 7) // 8, offset)
+			solution = np.where(np.unpackbits(bits)[:height * width].reshape(height, width), BOX, CROSS).astype(np.ubyte)
+		return lines[:height], lines[height:], solution
+
+	def __getitem__(self, index: Union[int, slice]) -> Union[Nonogram, list[Nonogram]]:
+		if isinstance(index, slice):
+			return [self[i] for i in range(*index.indices(len(self)))]
+		row_numbers, column_numbers, _ = self.__record(index)
+		nonogram = Nonogram(None, (len(row_numbers), len(column_numbers)))
+		nonogram.row_numbers = row_numbers
+		nonogram.column_numbers = column_numbers
+		return nonogram
+
+	def __iter__(self) -> Iterator[Nonogram]:
+		for index in range(len(self)):
+			yield self[index]
+
+	def solution(self, index: int) -> Union[np.ndarray, None]:
+		"""Returns the stored solution of a puzzle or None."""
+		return self.__record(index)[2]
+
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+#                                                      CONVERSION                                                      #
+# -------------------------------------------------------------------------------------------------------------------- #
+
+def convert_csv(files: list[str], output: Union[str, bytes, os.PathLike], solve_depth: Union[int, None] = None) -> int:
+	"""Packs CSV puzzle files in the given order and returns the amount of packed puzzles, unreadable files are skipped.
+	With a solve depth every puzzle is solved first and stored together with its solution if it could be solved."""
+	def puzzles() -> Iterator[Nonogram]:
+		for file in files:
+			#the Nonogram class prints its errors
+			messages = io.StringIO()
+			with contextlib.redirect_stdout(messages):
+				nonogram = Nonogram(file)
+			if not hasattr(nonogram, "board"):
+				print(f"{file}: {messages.getvalue().strip()}", file = sys.stderr)
+				continue
+			if solve_depth is not None:
+				NonogramSolver(nonogram).solve(False, solve_depth)
+				if not nonogram.is_solved():
+					nonogram.board[:] = EMPTY
+			yield nonogram
+	return write_pack(output, puzzles())
+
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+#                                                         MAIN                                                         #
+# -------------------------------------------------------------------------------------------------------------------- #
+
+if __name__ == "__main__":
+	from batch_solver import find_puzzles
+
+	parser = argparse.ArgumentParser(description = "Packs CSV nonogram puzzles into a single binary puzzle pack.")
+	parser.add_argument("output", help = "pack file to write")
+	parser.add_argument("paths", nargs = "+", help = "CSV files, directories or glob patterns")
+	parser.add_argument("-s", "--solutions", dest = "solve_depth", type = int, nargs = "?", const = 1, metavar = "DEPTH", help = "solves every puzzle (default assumption depth: 1) and stores the solutions")
+	args = parser.parse_args()
+
+	count = convert_csv(find_puzzles(args.paths), args.output, args.solve_depth)
+	print(f"Packed {count} puzzles into {args.output}.")
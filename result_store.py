@@ -0,0 +1,172 @@
+"""
+	Persistent store of solved puzzles: a SQLite file keyed by a canonical hash of the numbers, so a puzzle that was solved before
+	(also transposed or mirrored) is answered with a single lookup. The least recently used entries are evicted beyond a size limit.
+"""
+
+__all__ = ["ResultStore", "canonical_key"]
+
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+#                                                        IMPORTS                                                       #
+# -------------------------------------------------------------------------------------------------------------------- #
+
+import os, json, time, sqlite3, hashlib
+from typing import Union
+
+import numpy as np
+
+from nonogram import Nonogram, EMPTY, BOX
+
+#a transformation is (flip rows, flip columns, transpose), applied in this order, all 8 combinations map a puzzle onto an equivalent one
+TRANSFORMS = tuple((flip_rows, flip_columns, transpose) for transpose in (False, True) for flip_rows in (False, True) for flip_columns in (False, True))
+
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+#                                                    CANONICAL FORM                                                    #
+# -------------------------------------------------------------------------------------------------------------------- #
+
+def _transform_numbers(row_numbers: list[list[int]], column_numbers: list[list[int]], transform: tuple[bool, bool, bool]) -> tuple[list[list[int]], list[list[int]]]:
+	flip_rows, flip_columns, transpose = transform
+	if flip_rows:
+		row_numbers, column_numbers = row_numbers[::-1], [numbers[::-1] for numbers in column_numbers]
+	if flip_columns:
+		row_numbers, column_numbers = [numbers[::-1] for numbers in row_numbers], column_numbers[::-1]
+	if transpose:
+		row_numbers, column_numbers = column_numbers, row_numbers
+	return row_numbers, column_numbers
+
+def _transform_board(board: np.ndarray, transform: tuple[bool, bool, bool]) -> np.ndarray:
+	flip_rows, flip_columns, transpose = transform
+	if flip_rows:
+		board = board[::-1]
+	if flip_columns:
+		board = board[:, ::-1]
+	return board.T if transpose else board
+
+def _restore_board(board: np.ndarray, transform: tuple[bool, bool, bool]) -> np.ndarray:
+	flip_rows, flip_columns, transpose = transform
+	if transpose:
+		board = board.T
+	if flip_columns:
+		board = board[:, ::-1]
+	return board[::-1] if flip_rows else board
+
+def canonical_key(row_numbers: list[list[int]], column_numbers: list[list[int]]) -> tuple[str, tuple[bool, bool, bool]]:
+	"""Returns the hash of the smallest of the 8 transposed and mirrored forms of the numbers and the transformation that leads to it,
+	so every form of a puzzle gets the same key. Empty lines may be given as [] or [0]."""
+	row_numbers = [[int(number) for number in numbers if int(number) > 0] for numbers in row_numbers]
+	column_numbers = [[int(number) for number in numbers if int(number) > 0] for numbers in column_numbers]
+	text, transform = min((json.dumps(_transform_numbers(row_numbers, column_numbers, transform), separators = (",", ":")), transform) for transform in TRANSFORMS)
+	return hashlib.sha256(text.encode()).hexdigest(), transform
+
+def _box_runs(line: np.ndarray) -> list[int]:
+	return [len(run) for run in "".join("1" if cell == BOX else " " for cell in line).split()]
+
+def _agrees(board: np.ndarray, row_numbers: list[list[int]], column_numbers: list[list[int]]) -> bool:
+	"""Returns whether the board is fully decided and its boxes match the numbers. Empty lines may be given as [] or [0]."""
+	if board.shape != (len(row_numbers), len(column_numbers)) or np.any(board == EMPTY):
+		return False
+	return all(_box_runs(line) == [int(number) for number in numbers if int(number) > 0] for lines, numbers_list in ((board, row_numbers), (board.T, column_numbers)) for line, numbers in zip(lines, numbers_list))
+
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+#                                                  RESULT STORE CLASS                                                  #
+# -------------------------------------------------------------------------------------------------------------------- #
+
+class ResultStore:
+	"""Solved boards with the assumption depth that was needed and the solver statistics, keyed by canonical_key.
+	Boards are stored in the canonical orientation and turned back into the orientation of the asking puzzle.
+	Several processes may share the file. Beyond size entries the least recently used ones are evicted.
+	Lookups only read, the times of use are written in batches of USED_BATCH along with the next put or on close.
+
+	Attributes:
+		hits (int): Lookups that found a solution.
+		misses (int): Lookups that didn't.
+	"""
+	DEFAULT_SIZE = 100000
+	USED_BATCH = 100
+
+	def __init__(self, file: Union[str, bytes, os.PathLike], size: int = DEFAULT_SIZE):
+		self.file = file
+		self.size = size
+		self.hits = self.misses = 0
+		self.__used = {}
+		#waits for other processes instead of failing while they write
+		self.__connection = sqlite3.connect(file, timeout = 30)
+		self.__connection.execute("PRAGMA journal_mode = WAL")
+		with self.__connection:
+			self.__connection.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, height INTEGER, width INTEGER, board BLOB, depth INTEGER, stats TEXT, used REAL)")
+			self.__connection.execute("CREATE INDEX IF NOT EXISTS results_used ON results (used)")
+			#the number of entries is kept up to date by put and clear, so counting never scans the table
+			self.__connection.execute("CREATE TABLE IF NOT EXISTS entries (count INTEGER)")
+			if self.__connection.execute("SELECT count FROM entries").fetchone() is None:
+				self.__connection.execute("INSERT INTO entries SELECT COUNT(*) FROM results")
+
+	def __len__(self) -> int:
+		return self.__connection.execute("SELECT count FROM entries").fetchone()[0]
+
+	def __repr__(self) -> str:
+		return "ResultStore ({}, {}/{} entries, {} hits, {} misses)".format(self.file, len(self), self.size, self.hits, self.misses)
+
+	def __enter__(self) -> "ResultStore":
+		return self
+
+	def __exit__(self, *_):
+		self.close()
+
+	def close(self):
+		self.__write_used()
+		self.__connection.close()
+
+	def __write_used(self):
+		if self.__used:
+			with self.__connection:
+				self.__connection.executemany("UPDATE results SET used = ? WHERE key = ?", [(used, key) for key, used in self.__used.items()])
+			self.__used.clear()
+
+	def get(self, nonogram: Nonogram) -> Union[dict, None]:
+		"""Returns {"board", "depth", "stats"} of a stored solution of the puzzle (board in the orientation of the puzzle) or None.
+		A solution that doesn't match the numbers or disagrees with the decided cells of the puzzle's board isn't returned."""
+		key, transform = canonical_key(nonogram.row_numbers, nonogram.column_numbers)
+		row = self.__connection.execute("SELECT height, width, board, depth, stats FROM results WHERE key = ?", (key,)).fetchone()
+		if row is not None:
+			height, width, board, depth, stats = row
+			board = _restore_board(np.frombuffer(board, np.ubyte).reshape(height, width), transform)
+			if _agrees(board, nonogram.row_numbers, nonogram.column_numbers) and np.all((nonogram.board == EMPTY) | (nonogram.board == board)):
+				self.__used[key] = time.time()
+				if len(self.__used) >= self.USED_BATCH:
+					self.__write_used()
+				self.hits += 1
+				return {"board": board.copy(), "depth": depth, "stats": json.loads(stats)}
+		self.misses += 1
+		return None
+
+	def put(self, nonogram: Nonogram, board: np.ndarray, depth: Union[int, None] = None, stats: Union[dict, None] = None):
+		"""Stores the solved board of the puzzle with the assumption depth that solved it (None if unknown) and JSON-serializable statistics.
+		Raises a ValueError if the board doesn't match the numbers."""
+		if not _agrees(board, nonogram.row_numbers, nonogram.column_numbers):
+			raise ValueError("The board doesn't solve the nonogram.")
+		key, transform = canonical_key(nonogram.row_numbers, nonogram.column_numbers)
+		board = np.ascontiguousarray(_transform_board(board, transform), np.ubyte)
+		self.__write_used()
+		values = (*board.shape, board.tobytes(), depth, json.dumps(stats or {}), time.time())
+		with self.__connection:
+			if self.__connection.execute("INSERT OR IGNORE INTO results VALUES (?, ?, ?, ?, ?, ?, ?)", (key, *values)).rowcount:
+				#only a new row can take the store beyond its size
+				self.__connection.execute("UPDATE entries SET count = count + 1")
+				excess = len(self) - self.size
+				if excess > 0:
+					evicted = self.__connection.execute("DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY used LIMIT ?)", (excess,)).rowcount
+					self.__connection.execute("UPDATE entries SET count = count - ?", (evicted,))
+			else:
+				self.__connection.execute("UPDATE results SET height = ?, width = ?, board = ?, depth = ?, stats = ?, used = ? WHERE key = ?", (*values, key))
+
+	def clear(self):
+		with self.__connection:
+			self.__connection.execute("DELETE FROM results")
+			self.__connection.execute("UPDATE entries SET count = 0")
+		self.__used.clear()
+		self.hits = self.misses = 0
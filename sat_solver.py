@@ -0,0 +1,398 @@
+"""
+	Complete solving engine: encodes a nonogram as CNF and solves it with a bundled conflict driven clause learning (CDCL) solver
+	or with pysat (https://pysathq.github.io) if it is installed.
+"""
+
+__all__ = ["SAT_BACKENDS", "NonogramCNF", "CDCLSolver", "solve_cnf"]
+
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+#                                                        IMPORTS                                                       #
+# -------------------------------------------------------------------------------------------------------------------- #
+
+import heapq, threading
+from typing import Union, Callable
+
+import numpy as np
+
+from nonogram import Nonogram, EMPTY, CROSS, BOX
+
+try:
+	from pysat.solvers import Solver as PySatSolver
+except ImportError:
+	PySatSolver = None
+
+SAT_BACKENDS = ("auto", "cdcl", "pysat")
+CALLBACK_INTERVAL = 0.1 #seconds between two callbacks while pysat is solving
+
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+#                                                     CNF ENCODING                                                     #
+# -------------------------------------------------------------------------------------------------------------------- #
+
+class NonogramCNF:
+	"""CNF encoding of a nonogram puzzle including its known cells.\n
+	Variable i * width + j + 1 is true if cell (i, j) is a box. Every number of every line gets one variable per possible start,
+	exactly one of them is true, the starts of neighbouring numbers leave at least one cell between them
+	and a cell is a box if and only if a number covers it.
+
+	Attributes:
+		height (int): Amount of rows.
+		width (int): Amount of columns.
+		variables (int): Amount of variables.
+		clauses (list[list[int]]): Clauses as lists of DIMACS literals (variable or negated variable).
+	"""
+	def __init__(self, nonogram: Nonogram, callback: Callable = lambda *_: None):
+		"""The callback is called before every encoded line, it may raise an exception to stop the encoding."""
+		self.height, self.width = nonogram.board.shape
+		self.variables = self.height * self.width
+		self.clauses: list[list[int]] = []
+		cells = np.arange(1, self.variables + 1).reshape(self.height, self.width)
+		for numbers, line, variables in zip(nonogram.row_numbers, nonogram.board, cells):
+			callback()
+			self.__encode_line(list(numbers), line, variables.tolist())
+		for numbers, line, variables in zip(nonogram.column_numbers, nonogram.board.T, cells.T):
+			callback()
+			self.__encode_line(list(numbers), line, variables.tolist())
+		for (i, j), value in np.ndenumerate(nonogram.board):
+			if value != EMPTY:
+				self.clauses.append([int(cells[i, j]) if value == BOX else -int(cells[i, j])])
+
+	def __repr__(self) -> str:
+		return "NonogramCNF ({}x{}, {} variables, {} clauses)".format(self.height, self.width, self.variables, len(self.clauses))
+
+	def __new_variable(self) -> int:
+		self.variables += 1
+		return self.variables
+
+	def __encode_line(self, numbers: list[int], line: np.ndarray, cells: list[int]):
+		length = len(cells)
+		if not numbers:
+			self.clauses.extend([-cell] for cell in cells)
+			return
+		crosses = np.concatenate(([0], np.cumsum(line == CROSS)))
+		#possible starts of every number, starts over known crosses or next to known boxes are left out
+		starts: list[dict[int, int]] = []
+		for j, number in enumerate(numbers):
+			earliest = sum(numbers[:j]) + j
+			latest = length - sum(numbers[j:]) - (len(numbers) - 1 - j)
+			positions = {}
+			for p in range(earliest, latest + 1):
+				if crosses[p + number] - crosses[p] or (p > 0 and line[p - 1] == BOX) or (p + number < length and line[p + number] == BOX):
+					continue
+				positions[p] = self.__new_variable()
+			starts.append(positions)
+			#exactly one start (an empty clause if there is none)
+			self.clauses.append(list(positions.values()))
+			variables = list(positions.values())
+			self.clauses.extend([-a, -b] for k, a in enumerate(variables) for b in variables[k + 1:])
+		#the next number starts after this one and a gap
+		for j in range(len(numbers) - 1):
+			for p, a in starts[j].items():
+				self.clauses.extend([-a, -b] for q, b in starts[j + 1].items() if q < p + numbers[j] + 1)
+		#a cell is a box if and only if a number covers it
+		for c, cell in enumerate(cells):
+			covering = [variable for j, number in enumerate(numbers) for p, variable in starts[j].items() if p <= c < p + number]
+			self.clauses.append([-cell] + covering)
+			self.clauses.extend([-variable, cell] for variable in covering)
+
+	def to_dimacs(self) -> str:
+		"""Returns the CNF in the DIMACS format."""
+		lines = [f"c nonogram {self.height}x{self.width}, variable i * {self.width} + j + 1 is cell (i, j)", f"p cnf {self.variables} {len(self.clauses)}"]
+		lines.extend(" ".join(map(str, clause + [0])) for clause in self.clauses)
+		return "\n".join(lines) + "\n"
+
+	def decode(self, model: list[int]) -> np.ndarray:
+		"""Converts a model (list of true or negated literals) into a solved board."""
+		boxes = np.zeros(self.height * self.width, bool)
+		for literal in model:
+			if 0 < literal <= boxes.size:
+				boxes[literal - 1] = True
+		return np.where(boxes, BOX, CROSS).astype(np.ubyte).reshape(self.height, self.width)
+
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+#                                                      CDCL SOLVER                                                     #
+# -------------------------------------------------------------------------------------------------------------------- #
+
+def _luby(i: int) -> int:
+	"""Returns the i-th element (starting at 0) of the Luby sequence 1, 1, 2, 1, 1, 2, 4, 1, ..."""
+	size, exponent = 1, 0
+	while size < i + 1:
+		exponent += 1
+		size = 2 * size + 1
+	while size - 1 != i:
+		size = (size - 1) >> 1
+		exponent -= 1
+		i %= size
+	return 1 << exponent
+
+class CDCLSolver:
+	"""Small conflict driven clause learning SAT solver: two watched literals, first UIP learning with non-chronological backjumping,
+	variable activities (VSIDS), phase saving and Luby restarts.\n
+	Values and watch lists are indexed by literal, negative literals wrap around to the end of the lists.
+
+	Attributes:
+		variables (int): Amount of variables.
+		conflicts (int): Conflicts found so far.
+		decisions (int): Decisions made so far.
+	"""
+	RESTART_INTERVAL = 100
+	ACTIVITY_DECAY = 0.95
+
+	def __init__(self, clauses: list[list[int]], variables: int):
+		self.variables = variables
+		self.conflicts = self.decisions = 0
+		self.__values = [0] * (2 * variables + 1)
+		self.__levels = [0] * (variables + 1)
+		self.__reasons: list[Union[list[int], None]] = [None] * (variables + 1)
+		self.__watches: list[list[list[int]]] = [[] for _ in range(2 * variables + 1)]
+		self.__activity = [0.0] * (variables + 1)
+		self.__phases = [False] * (variables + 1)
+		self.__increment = 1.0
+		self.__heap = [(0.0, variable) for variable in range(1, variables + 1)]
+		self.__heap_entries = [1] * (variables + 1) #outdated entries stay in the heap until they are popped
+		self.__trail: list[int] = []
+		self.__trail_limits: list[int] = []
+		self.__head = 0
+		self.__unsatisfiable = False
+		for clause in clauses:
+			self.add_clause(clause)
+
+	def __repr__(self) -> str:
+		return "CDCLSolver ({} variables, {} conflicts, {} decisions)".format(self.variables, self.conflicts, self.decisions)
+
+	def add_clause(self, clause: list[int]):
+		"""Adds a clause before solving."""
+		clause = list(dict.fromkeys(clause))
+		if any(-literal in clause for literal in clause):
+			return
+		if not clause:
+			self.__unsatisfiable = True
+		elif len(clause) == 1:
+			if self.__values[clause[0]] == -1:
+				self.__unsatisfiable = True
+			elif self.__values[clause[0]] == 0:
+				self.__assign(clause[0], None)
+		else:
+			self.__watches[clause[0]].append(clause)
+			self.__watches[clause[1]].append(clause)
+
+	def __assign(self, literal: int, reason: Union[list[int], None]):
+		self.__values[literal] = 1
+		self.__values[-literal] = -1
+		variable = abs(literal)
+		self.__levels[variable] = len(self.__trail_limits)
+		self.__reasons[variable] = reason
+		self.__trail.append(literal)
+
+	def __propagate(self) -> Union[list[int], None]:
+		"""Assigns every implied literal. Returns a conflicting clause or None.\n
+		The watched literals of a clause are its first two, the false one is moved to position 1."""
+		values, watches, trail = self.__values, self.__watches, self.__trail
+		levels, reasons = self.__levels, self.__reasons
+		level = len(self.__trail_limits)
+		head = self.__head
+		conflict = None
+		while head < len(trail):
+			false_literal = -trail[head]
+			head += 1
+			watching = watches[false_literal]
+			kept = []
+			for i, clause in enumerate(watching):
+				if clause[0] == false_literal:
+					clause[0], clause[1] = clause[1], false_literal
+				first = clause[0]
+				if values[first] == 1:
+					kept.append(clause)
+					continue
+				for k in range(2, len(clause)):
+					if values[clause[k]] != -1:
+						clause[1], clause[k] = clause[k], false_literal
+						watches[clause[1]].append(clause)
+						break
+				else:
+					kept.append(clause)
+					if values[first] == -1:
+						conflict = clause
+						kept.extend(watching[i + 1:])
+						break
+					#inlined __assign
+					values[first] = 1
+					values[-first] = -1
+					variable = first if first > 0 else -first
+					levels[variable] = level
+					reasons[variable] = clause
+					trail.append(first)
+			watches[false_literal] = kept
+			if conflict is not None:
+				break
+		self.__head = head
+		return conflict
+
+	def __bump(self, variable: int):
+		self.__activity[variable] += self.__increment
+		if self.__activity[variable] > 1e100:
+			self.__activity = [activity * 1e-100 for activity in self.__activity]
+			self.__increment *= 1e-100
+			self.__heap = [(-self.__activity[v], v) for v in range(1, self.variables + 1) if self.__values[v] == 0]
+			heapq.heapify(self.__heap)
+			self.__heap_entries = [0] * (self.variables + 1)
+			for _, v in self.__heap:
+				self.__heap_entries[v] = 1
+		else:
+			heapq.heappush(self.__heap, (-self.__activity[variable], variable))
+			self.__heap_entries[variable] += 1
+
+	def __analyze(self, conflict: list[int]) -> tuple[list[int], int]:
+		"""Resolves the conflict back to the first unique implication point. Returns the learned clause and the level to jump back to."""
+		levels, trail = self.__levels, self.__trail
+		level = len(self.__trail_limits)
+		seen = set()
+		learned = [0]
+		counter = 0
+		index = len(trail) - 1
+		clause = conflict
+		while True:
+			for literal in clause:
+				variable = abs(literal)
+				if variable not in seen and levels[variable] > 0:
+					seen.add(variable)
+					self.__bump(variable)
+					if levels[variable] == level:
+						counter += 1
+					else:
+						learned.append(literal)
+			while abs(trail[index]) not in seen:
+				index -= 1
+			literal = trail[index]
+			index -= 1
+			counter -= 1
+			if counter == 0:
+				break
+			clause = self.__reasons[abs(literal)]
+		learned[0] = -literal
+		#leave out literals that are implied by the other literals of the clause
+		learned[1:] = [literal for literal in learned[1:] if not self.__redundant(abs(literal), seen)]
+		if len(learned) == 1:
+			return learned, 0
+		#the literal of the highest remaining level is watched next to the asserting literal
+		highest = max(range(1, len(learned)), key = lambda k: levels[abs(learned[k])])
+		learned[1], learned[highest] = learned[highest], learned[1]
+		return learned, levels[abs(learned[1])]
+
+	def __redundant(self, variable: int, seen: set[int]) -> bool:
+		reason = self.__reasons[variable]
+		return reason is not None and all(abs(literal) in seen or self.__levels[abs(literal)] == 0 for literal in reason)
+
+	def __backtrack(self, level: int):
+		if len(self.__trail_limits) <= level:
+			return
+		start = self.__trail_limits[level]
+		values, reasons, phases, activity, heap, heap_entries = self.__values, self.__reasons, self.__phases, self.__activity, self.__heap, self.__heap_entries
+		for literal in self.__trail[start:]:
+			variable = literal if literal > 0 else -literal
+			values[literal] = values[-literal] = 0
+			reasons[variable] = None
+			phases[variable] = literal > 0
+			if not heap_entries[variable]:
+				heapq.heappush(heap, (-activity[variable], variable))
+				heap_entries[variable] = 1
+		del self.__trail[start:]
+		del self.__trail_limits[level:]
+		self.__head = start
+
+	def __decide(self) -> bool:
+		"""Assigns the unassigned variable with the highest activity its saved phase. Returns False if every variable is assigned."""
+		while self.__heap:
+			_, variable = heapq.heappop(self.__heap)
+			self.__heap_entries[variable] -= 1
+			if self.__values[variable] == 0:
+				self.decisions += 1
+				self.__trail_limits.append(len(self.__trail))
+				self.__assign(variable if self.__phases[variable] else -variable, None)
+				return True
+		return False
+
+	def solve(self, callback: Callable = lambda *_: None) -> Union[list[int], None]:
+		"""Returns a model (every variable as true or negated literal) or None if the clauses are unsatisfiable.
+		The callback is called every 256 conflicts, it may raise an exception to stop the search."""
+		if self.__unsatisfiable:
+			return None
+		restarts = 0
+		restart_limit = _luby(restarts) * CDCLSolver.RESTART_INTERVAL
+		conflicts_since_restart = 0
+		while True:
+			conflict = self.__propagate()
+			if conflict is not None:
+				self.conflicts += 1
+				conflicts_since_restart += 1
+				if not self.__trail_limits:
+					return None
+				learned, level = self.__analyze(conflict)
+				self.__backtrack(level)
+				if len(learned) == 1:
+					self.__assign(learned[0], None)
+				else:
+					self.__watches[learned[0]].append(learned)
+					self.__watches[learned[1]].append(learned)
+					self.__assign(learned[0], learned)
+				self.__increment /= CDCLSolver.ACTIVITY_DECAY
+				if self.conflicts % 256 == 0:
+					callback()
+				continue
+			if conflicts_since_restart >= restart_limit:
+				self.__backtrack(0)
+				restarts += 1
+				restart_limit = _luby(restarts) * CDCLSolver.RESTART_INTERVAL
+				conflicts_since_restart = 0
+			if not self.__decide():
+				return [variable if self.__values[variable] == 1 else -variable for variable in range(1, self.variables + 1)]
+
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+#                                                   SOLVING FUNCTIONS                                                  #
+# -------------------------------------------------------------------------------------------------------------------- #
+
+def solve_cnf(cnf: NonogramCNF, backend: str = "auto", callback: Callable = lambda *_: None) -> Union[list[int], None]:
+	"""Solves the CNF and returns a model or None if it is unsatisfiable.\n
+	The backend is either "cdcl" (bundled CDCLSolver), "pysat" (needs the python-sat package) or "auto" (pysat if it is installed, otherwise cdcl).
+	The callback may raise an exception to stop the search. The bundled solver calls it every 256 conflicts.
+	pysat is interrupted from a watchdog thread that calls it every CALLBACK_INTERVAL seconds."""
+	if backend not in SAT_BACKENDS:
+		raise ValueError(f"Unknown SAT backend '{backend}', choose from {', '.join(SAT_BACKENDS)}.")
+	if backend == "pysat" and PySatSolver is None:
+		raise ImportError("The SAT backend 'pysat' needs the python-sat package.")
+	if any(not clause for clause in cnf.clauses):
+		return None
+	if backend == "cdcl" or PySatSolver is None:
+		return CDCLSolver(cnf.clauses, cnf.variables).solve(callback)
+	with PySatSolver() as solver:
+		#clauses are added in chunks, so the callback can stop a big encoding early
+		for start in range(0, len(cnf.clauses), 65536):
+			callback()
+			solver.append_formula(cnf.clauses[start:start + 65536])
+		stopped = threading.Event()
+		errors = []
+		def watchdog():
+			while not stopped.wait(CALLBACK_INTERVAL):
+				try:
+					callback()
+				except BaseException as error:
+					errors.append(error)
+					solver.interrupt()
+					return
+		thread = threading.Thread(target = watchdog, daemon = True)
+		thread.start()
+		try:
+			satisfiable = solver.solve_limited(expect_interrupt = True)
+		finally:
+			stopped.set()
+			thread.join()
+		if errors:
+			raise errors[0]
+		return solver.get_model() if satisfiable else None
@@ -0,0 +1,173 @@
+"""
+	Long-running solver: reads one JSON request per line from stdin or from the clients of a Unix socket and answers every request with one JSON line.
+	The requests are solved in a pool of worker processes that are started once, every worker keeps its line cache warm between requests.
+"""
+
+__all__ = ["handle_request", "serve_stdin", "serve_socket"]
+
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+#                                                        IMPORTS                                                       #
+# -------------------------------------------------------------------------------------------------------------------- #
+
+import os, io, sys, json, signal, argparse, threading, contextlib, socketserver
+from multiprocessing import Pool
+from typing import Union, TextIO
+
+from nonogram import Nonogram
+from nonogram_solver import NonogramSolver, LineCache
+from batch_solver import load_puzzle, solve_nonogram
+
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+#                                                        WORKERS                                                       #
+# -------------------------------------------------------------------------------------------------------------------- #
+
+_worker_line_cache: Union[LineCache, None] = None
+
+def _init_server_worker(cache_size: int):
+	global _worker_line_cache
+	_worker_line_cache = LineCache(cache_size) if cache_size > 0 else None
+
+def _request_nonogram(request: dict) -> Nonogram:
+	if "file" in request:
+		messages = io.StringIO()
+		with contextlib.redirect_stdout(messages):
+			nonogram = load_puzzle(request["file"])
+		if not hasattr(nonogram, "board"):
+			raise ValueError(messages.getvalue().strip())
+		return nonogram
+	if "rows" in request and "columns" in request:
+		nonogram = Nonogram(None, (len(request["rows"]), len(request["columns"])))
+		nonogram.row_numbers = [[int(number) for number in line if int(number) > 0] for line in request["rows"]]
+		nonogram.column_numbers = [[int(number) for number in line if int(number) > 0] for line in request["columns"]]
+		return nonogram
+	raise ValueError("A request needs either 'file' or 'rows' and 'columns'.")
+
+def _contradiction(nonogram: Nonogram) -> Union[str, None]:
+	"""Returns why the numbers can't have a solution if that is visible without solving, otherwise None."""
+	for name, lines, length in (("row", nonogram.row_numbers, len(nonogram.column_numbers)), ("column", nonogram.column_numbers, len(nonogram.row_numbers))):
+		for index, numbers in enumerate(lines):
+			if sum(numbers) + len(numbers) - 1 > length:
+				return f"The numbers of {name} {index + 1} don't fit into {length} cells."
+	row_boxes, column_boxes = sum(map(sum, nonogram.row_numbers)), sum(map(sum, nonogram.column_numbers))
+	if row_boxes != column_boxes:
+		return f"The rows have {row_boxes} boxes, but the columns have {column_boxes}."
+	return None
+
+def handle_request(line: str, defaults: dict) -> dict:
+	"""Answers a single request line. Requests are JSON objects with:
+	- "file" (CSV file or 'pack#index') or "rows" and "columns" (lists of numbers)
+	- optional "id", which is copied into the answer
+	- optional "depth" and "timeout", the server's defaults are used otherwise
+	- optional "count": counts the solutions up to this limit instead of solving, the timeout applies as well\n
+	Numbers that obviously contradict each other are answered right away with solved (or count) false (0) and an error."""
+	try:
+		request = json.loads(line)
+		if not isinstance(request, dict):
+			raise ValueError("A request has to be a JSON object.")
+	except ValueError as error:
+		return {"id": None, "error": f"Invalid request: {error}"}
+	result = {"id": request.get("id")}
+	try:
+		nonogram = _request_nonogram(request)
+		contradiction = _contradiction(nonogram)
+		if contradiction is not None:
+			result.update({"count": 0, "solutions": []} if "count" in request else {"solved": False, "depth": None})
+			result["error"] = contradiction
+			return result
+		timeout = float(request.get("timeout", defaults["timeout"]))
+		if "count" in request:
+			solver = NonogramSolver(nonogram, **defaults["options"])
+			if _worker_line_cache is not None:
+				solver.line_cache = _worker_line_cache
+			count, boards = solver.count_solutions(int(request["count"]), time_limit = timeout)
+			if solver.stopped_by == "time":
+				result["timeout"] = True
+			result["count"] = count
+			result["solutions"] = []
+			for board in boards:
+				solver.nonogram.board = board
+				result["solutions"].append(solver.nonogram.to_text())
+			return result
+		depth = int(request.get("depth", defaults["depth"]))
+		result.update(solve_nonogram(nonogram, depth, timeout, defaults["options"], _worker_line_cache))
+	except (OSError, ValueError, TypeError, IndexError) as error:
+		result["error"] = str(error)
+	return result
+
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+#                                                        SERVING                                                       #
+# -------------------------------------------------------------------------------------------------------------------- #
+
+def serve_stdin(pool: Pool, defaults: dict, input: TextIO = sys.stdin, output: TextIO = sys.stdout):
+	"""Hands every line of input to the pool and writes the answers in the order they finish. Returns at the end of input once every answer is written."""
+	lock = threading.Lock()
+	def write(result: dict):
+		with lock:
+			print(json.dumps(result, ensure_ascii = False), file = output, flush = True)
+	for line in input:
+		if line.strip():
+			pool.apply_async(handle_request, (line, defaults), callback = write, error_callback = lambda error: write({"id": None, "error": str(error)}))
+	pool.close()
+	pool.join()
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+	def handle(self):
+		#every client gets its own thread, so the requests of several clients are solved at once
+		for line in self.rfile:
+			if not line.strip():
+				continue
+			try:
+				result = self.server.pool.apply(handle_request, (line.decode(), self.server.defaults))
+			except Exception as error:
+				result = {"id": None, "error": str(error)}
+			self.wfile.write((json.dumps(result, ensure_ascii = False) + "\n").encode())
+			self.wfile.flush()
+
+def serve_socket(pool: Pool, defaults: dict, path: str):
+	"""Answers the requests of every client connected to a Unix socket at path until the process is interrupted.
+	The answers of a client come in the order of its requests."""
+	if os.path.exists(path):
+		os.remove(path)
+	with socketserver.ThreadingUnixStreamServer(path, _RequestHandler) as server:
+		server.daemon_threads = True
+		server.pool = pool
+		server.defaults = defaults
+		try:
+			server.serve_forever()
+		finally:
+			os.remove(path)
+
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+#                                                         MAIN                                                         #
+# -------------------------------------------------------------------------------------------------------------------- #
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description = "Keeps nonogram solvers running and answers JSON requests from stdin or a Unix socket.")
+	parser.add_argument("--socket", dest = "socket", metavar = "PATH", help = "listens on a Unix socket instead of reading stdin")
+	parser.add_argument("-j", "--jobs", dest = "jobs", type = int, default = 0, help = "amount of worker processes (default: one per CPU)")
+	parser.add_argument("-d", "--depth", dest = "depth", type = int, choices = range(NonogramSolver.MAX_DEPTH + 1), default = 1, help = "default maximum assumption depth")
+	parser.add_argument("--timeout", dest = "timeout", type = float, default = 0, metavar = "SECONDS", help = "default time limit per puzzle, 0 means no limit")
+	parser.add_argument("-l", "--line-solver", dest = "line_solver", choices = NonogramSolver.LINE_SOLVERS, default = "settle", help = "line solving method")
+	parser.add_argument("-b", "--board", dest = "board_engine", choices = NonogramSolver.BOARD_ENGINES, default = "array", help = "board representation used for propagation")
+	parser.add_argument("-c", "--cache", dest = "cache_size", type = int, default = LineCache.DEFAULT_SIZE, metavar = "SIZE", help = "amount of solved lines every worker remembers, 0 turns the cache off")
+	args = parser.parse_args()
+
+	defaults = {"depth": args.depth, "timeout": args.timeout, "options": {"line_solver": args.line_solver, "board_engine": args.board_engine, "cache_size": 0}}
+	with Pool(args.jobs or os.cpu_count(), _init_server_worker, (args.cache_size,)) as pool:
+		#stop like on Ctrl+C, so the socket file gets removed
+		signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+		try:
+			if args.socket:
+				serve_socket(pool, defaults, args.socket)
+			else:
+				serve_stdin(pool, defaults)
+		except KeyboardInterrupt:
+			exit(130)
@@ -1,7 +1,12 @@
+import os, json, sqlite3, tempfile
 import numpy as np
 
-from nonogram_solver import NonogramSolver
-from nonogram import EMPTY, CROSS, BOX
+from nonogram_solver import NonogramSolver, LineIndex, ProbeStore, rle_box_lengths, UNDECIDED, CONTRADICTION
+from nonogram import Nonogram, EMPTY, CROSS, BOX
+from bitboard import BitNonogram, array_to_mask, settle_line, line_fits
+from sat_solver import NonogramCNF, solve_cnf
+from generator import random_nonogram, board_numbers
+from result_store import ResultStore, TRANSFORMS, canonical_key, _transform_board
 
 
 """
@@ -33,4 +38,227 @@ line = np.array([EMPTY, EMPTY, EMPTY, CROSS, BOX, CROSS, EMPTY, EMPTY, EMPTY, EM
 print(line)
 print("Result:")
 #print(NonogramSolver._NonogramSolver__check_line_solvability([1, 3], line))
-print(list(NonogramSolver._NonogramSolver__get_all_possible_positions(3, line, 2)))
\ No newline at end of file
+print(list(NonogramSolver._NonogramSolver__get_all_possible_positions(3, line, 2)))
+
+
+
+def random_lines(count: int, seed: int = 0):
+	"""Yields the numbers and a partly revealed line of random solutions, so every line can still be solved."""
+	rng = np.random.default_rng(seed)
+	for _ in range(count):
+		solution = np.where(rng.random(int(rng.integers(1, 16))) < rng.random(), BOX, CROSS).astype(np.ubyte)
+		line = solution.copy()
+		line[rng.random(line.size) < rng.random()] = EMPTY
+		yield [int(number) for number in rle_box_lengths(solution)], line
+
+def fitting_placements(numbers: list[int], line: np.ndarray) -> list[np.ndarray]:
+	"""Returns every placement of the numbers that agrees with the known cells of the line, the slow but obvious answer for the line solvers."""
+	def placements(numbers: list[int], start: int):
+		if not numbers:
+			yield np.full(line.size, CROSS, np.ubyte)
+			return
+		for position in range(start, line.size - sum(numbers) - len(numbers) + 2):
+			for placement in placements(numbers[1:], position + numbers[0] + 1):
+				placement[position:position + numbers[0]] = BOX
+				yield placement
+	return [placement for placement in placements(list(numbers), 0) if np.all((line == EMPTY) | (line == placement))]
+
+def forced_cells(numbers: list[int], line: np.ndarray) -> np.ndarray:
+	fitting = np.array(fitting_placements(numbers, line))
+	result = line.copy()
+	result[(line == EMPTY) & np.all(fitting == BOX, axis = 0)] = BOX
+	result[(line == EMPTY) & np.all(fitting == CROSS, axis = 0)] = CROSS
+	return result
+
+def test_settle_finds_every_forced_cell():
+	for numbers, line in random_lines(2000):
+		actual = line.copy()
+		NonogramSolver._NonogramSolver__solve_line_settle(numbers, actual)
+		assert np.array_equal(actual, forced_cells(numbers, line)), (numbers, line, actual)
+
+def test_permutation_agrees_with_settle():
+	#the reference solver misses some cells, e.g. [1, 1, 2] on "  BX      BX  " leaves the cross at 8 open, but it never decides a wrong one
+	for numbers, line in random_lines(2000):
+		expected, actual = line.copy(), line.copy()
+		NonogramSolver._NonogramSolver__solve_line_settle(numbers, expected)
+		NonogramSolver._NonogramSolver__solve_line_permutation(numbers, actual)
+		assert np.all((actual == EMPTY) | (actual == expected)), (numbers, line, expected, actual)
+
+def test_bitset_settle_matches_settle():
+	for numbers, line in random_lines(2000):
+		expected = line.copy()
+		NonogramSolver._NonogramSolver__solve_line_settle(numbers, expected)
+		boxes, crosses = settle_line(numbers, array_to_mask(line == BOX), array_to_mask(line == CROSS), line.size)
+		assert boxes == array_to_mask(expected == BOX) and crosses == array_to_mask(expected == CROSS), (numbers, line, expected)
+
+def test_bitset_finds_contradictions():
+	rng = np.random.default_rng(1)
+	for numbers, _ in random_lines(2000):
+		#random cells, most of these lines can't be solved anymore
+		line = rng.choice(np.array([EMPTY, CROSS, BOX], np.ubyte), len(numbers) * 2 + 1)
+		fits = bool(fitting_placements(numbers, line))
+		assert line_fits(numbers, array_to_mask(line == BOX), array_to_mask(line == CROSS), line.size) == fits, (numbers, line)
+		assert (settle_line(numbers, array_to_mask(line == BOX), array_to_mask(line == CROSS), line.size) is None) != fits, (numbers, line)
+
+def test_bitset_propagation_matches_array():
+	for file in ("example_files/example1.csv", "example_files/example4.csv", "example_files/exampleX_unsolved.csv"):
+		nonogram = Nonogram(file)
+		bit_nonogram = BitNonogram.from_nonogram(nonogram)
+		assert bit_nonogram.propagate()
+		array_solver = NonogramSolver(file)
+		array_solver.solve(False, 0)
+		assert np.array_equal(bit_nonogram.to_nonogram().board, array_solver.nonogram.board), file
+
+def matches_numbers(board: np.ndarray, nonogram: Nonogram) -> bool:
+	return not np.any(board == EMPTY) and all(rle_box_lengths(line) == list(numbers) for numbers, line in zip(nonogram.row_numbers, board)) and all(rle_box_lengths(line) == list(numbers) for numbers, line in zip(nonogram.column_numbers, board.T))
+
+def test_sat_boards_match_numbers():
+	#random boards often have several solutions, the SAT engine has to find one of them
+	for seed in range(20):
+		nonogram = random_nonogram(12, 10, seed = seed)
+		for backend in ("cdcl", "auto"):
+			cnf = NonogramCNF(nonogram.copy())
+			model = solve_cnf(cnf, backend)
+			assert model is not None and matches_numbers(cnf.decode(model), nonogram), (seed, backend)
+		solver = NonogramSolver(nonogram.copy())
+		assert solver.solve(False, engine = "sat") and matches_numbers(solver.nonogram.board, nonogram), seed
+
+def test_sat_finds_no_solution():
+	nonogram = Nonogram(None, (2, 2))
+	nonogram.row_numbers, nonogram.column_numbers = [[2], []], [[1], []]
+	assert solve_cnf(NonogramCNF(nonogram)) is None
+	solver = NonogramSolver(nonogram)
+	assert not solver.solve(False, engine = "sat") and solver.unsolvable
+
+def test_result_store_orientation():
+	solver = NonogramSolver("example_files/example1.csv")
+	assert solver.solve(False, 1)
+	solution = solver.nonogram.board.copy()
+	with tempfile.TemporaryDirectory() as directory, ResultStore(os.path.join(directory, "results.db")) as store:
+		store.put(solver.nonogram, solution, 1)
+		keys = set()
+		for transform in TRANSFORMS:
+			board = _transform_board(solution, transform)
+			nonogram = Nonogram(None, board.shape)
+			nonogram.row_numbers, nonogram.column_numbers = board_numbers(board == BOX)
+			keys.add(canonical_key(nonogram.row_numbers, nonogram.column_numbers)[0])
+			entry = store.get(nonogram)
+			assert entry is not None and np.array_equal(entry["board"], board) and entry["depth"] == 1, transform
+		assert len(keys) == 1 and len(store) == 1 and store.hits == len(TRANSFORMS)
+
+def test_result_store_checks_boards():
+	solver = NonogramSolver("example_files/example1.csv")
+	assert solver.solve(False, 1)
+	with tempfile.TemporaryDirectory() as directory:
+		file = os.path.join(directory, "results.db")
+		with ResultStore(file, 1) as store:
+			try:
+				store.put(solver.nonogram, np.full_like(solver.nonogram.board, CROSS))
+				assert False, "put accepted a wrong board"
+			except ValueError:
+				pass
+			store.put(solver.nonogram, solver.nonogram.board)
+			#a second puzzle evicts the first one
+			other = NonogramSolver("example_files/example2.csv")
+			assert other.solve(False, 1, store = store)
+			assert len(store) == 1 and store.get(solver.nonogram) is None
+		#a damaged entry isn't returned
+		connection = sqlite3.connect(file)
+		with connection:
+			connection.execute("UPDATE results SET board = zeroblob(length(board))")
+		connection.close()
+		with ResultStore(file) as store:
+			assert store.get(other.nonogram) is None
+
+def test_line_index_follows_changes():
+	rng = np.random.default_rng(2)
+	index = LineIndex()
+	for numbers, _ in random_lines(300):
+		line = np.full(max(sum(numbers) + len(numbers) - 1, 1) + int(rng.integers(0, 4)), EMPTY, np.ubyte)
+		assert index.check_line(False, 0, numbers, line) == bool(fitting_placements(numbers, line))
+		#fill random cells one by one, every check has to agree with the placements that still fit
+		for position in rng.permutation(line.size):
+			line[position] = rng.choice([CROSS, BOX])
+			assert index.check(False, 0, numbers, line, position) == bool(fitting_placements(numbers, line)), (numbers, line)
+		index.invalidate((0, 0))
+	assert index.hits > 0 and index.misses > 0
+
+def test_probe_store_outcomes():
+	store, board = ProbeStore(), np.full(9, EMPTY, np.ubyte)
+	store.put(0, BOX, CONTRADICTION, {})
+	store.put(1, BOX, UNDECIDED, {1: BOX, 2: CROSS})
+	store.put(4, BOX, UNDECIDED, {4: BOX, 5: BOX})
+	#a cell the assumption implied as well keeps its outcome, any other cell makes it try again
+	board[2] = CROSS
+	store.changed(np.array([2]), board)
+	assert store.get(0, BOX) == CONTRADICTION and store.get(1, BOX) == UNDECIDED and store.get(4, BOX) is None
+	board[7] = BOX
+	store.changed(np.array([7]), board)
+	assert store.get(0, BOX) == CONTRADICTION and store.get(1, BOX) is None and store.get(1, CROSS) is None
+	#an outcome tried on an older board is checked against the changes since then
+	store.put(8, CROSS, UNDECIDED, {8: CROSS, 7: BOX}, version = 0)
+	assert store.get(8, CROSS) is None and store.implied(8, CROSS) is None
+	assert (store.hits, store.misses, len(store)) == (3, 4, 1)
+
+def test_trail_matches_copy():
+	puzzles = [Nonogram(f"example_files/{name}.csv") for name in ("example0_unsolved", "exampleX_unsolved", "example10")] + [random_nonogram(15, 15, seed = seed) for seed in range(6)]
+	for nonogram in puzzles:
+		for depth in (1, 2):
+			boards = []
+			for search in ("trail", "copy"):
+				solver = NonogramSolver(nonogram.copy(), search = search)
+				solver.solve(False, depth)
+				boards.append(solver.nonogram.board)
+			assert np.array_equal(*boards), (nonogram, depth)
+
+def test_trail_rolls_back_stopped_assumptions():
+	full = NonogramSolver("example_files/example0_unsolved.csv")
+	assert full.solve(False, 2)
+	for max_probes in range(1, 8):
+		solver = NonogramSolver("example_files/example0_unsolved.csv")
+		solver.solve(False, 2, max_probes = max_probes)
+		#only cells that are decided for good are left, so they agree with the only solution
+		decided = solver.nonogram.board != EMPTY
+		assert solver.stopped_by == "probes" and np.array_equal(solver.nonogram.board[decided], full.nonogram.board[decided]), max_probes
+
+def test_checkpoint_round_trip():
+	file = "example_files/example0_unsolved.csv"
+	full = NonogramSolver(file, probe_order = "random", seed = 5)
+	assert full.solve(False, 2)
+	with tempfile.TemporaryDirectory() as directory:
+		checkpoint = os.path.join(directory, "checkpoint.json")
+		stopped = NonogramSolver(file, probe_order = "random", seed = 5)
+		assert not stopped.solve(False, 2, max_probes = 3, checkpoint = checkpoint)
+		with open(checkpoint, "r") as f:
+			state = json.load(f)
+		assert state["depth"] == 2 and state["probe_order"] == "random"
+		#another puzzle can't use the checkpoint
+		try:
+			NonogramSolver("example_files/example1.csv").load_checkpoint(checkpoint)
+			assert False, "a checkpoint of another puzzle was loaded"
+		except ValueError:
+			pass
+		resumed = NonogramSolver(file, probe_order = "random", seed = 5)
+		depth = resumed.load_checkpoint(checkpoint)
+		assert np.all((resumed.nonogram.board == EMPTY) | (resumed.nonogram.board == full.nonogram.board))
+		assert resumed.solve(False, depth, checkpoint = checkpoint) and np.array_equal(resumed.nonogram.board, full.nonogram.board)
+		#a solved puzzle removes its checkpoint
+		assert not os.path.exists(checkpoint)
+
+
+if __name__ == "__main__":
+	test_settle_finds_every_forced_cell()
+	test_permutation_agrees_with_settle()
+	test_bitset_settle_matches_settle()
+	test_bitset_finds_contradictions()
+	test_bitset_propagation_matches_array()
+	test_sat_boards_match_numbers()
+	test_sat_finds_no_solution()
+	test_result_store_orientation()
+	test_result_store_checks_boards()
+	test_line_index_follows_changes()
+	test_probe_store_outcomes()
+	test_trail_matches_copy()
+	test_trail_rolls_back_stopped_assumptions()
+	test_checkpoint_round_trip()
+	print("All tests passed.")